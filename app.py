@@ -6,6 +6,7 @@ from modules.missions import MissionManager
 from modules.bosses import BossManager
 from modules.world import WorldManager
 from modules.memory import MemoryManager
+from modules.scheduler import Scheduler
 
 # -----------------------------------------------------------
 # CONFIGURACIÓN DE LA PÁGINA (TEMA OSCURO RPG)
@@ -60,14 +61,12 @@ with st.container():
             unsafe_allow_html=True
         )
 
-        # Botón especial del sistema diario
+        # El ritual del día lo ejecuta el scheduler (python -m modules.scheduler run);
+        # el botón solo adelanta el tick diario y queda registrado para el daemon
         if st.button("⚡ ACTIVAR SISTEMA DEL DÍA"):
-            # generar misiones diarias
-            missions.generate_daily_missions()
-            # evento aleatorio
-            world.generate_random_world_event()
-            # backup
-            memory.auto_backup()
+            scheduler = Scheduler()
+            scheduler.run_job("daily")
+            scheduler.run_job("backup")
             st.success("Sistema del Día Activado. Nuevas misiones y eventos generados.")
 
 # -----------------------------------------------------------
@@ -207,16 +206,29 @@ st.markdown("## 📅 Misiones Activas del Día")
 
 daily_missions = stats.data["missions"]["daily"]
 
-for i, m in enumerate(daily_missions):
+
+def complete(mission_id):
+    # corre antes del render siguiente: no hace falta rerun
+    st.session_state["mission_msg"] = missions.complete_from_ui(mission_id)
+
+
+msg = st.session_state.pop("mission_msg", None)
+if msg:
+    getattr(st, msg[0])(msg[1])
+
+for m in daily_missions:
     with st.expander(f"{m['title']} — {m['reward_exp']} XP"):
         st.write(m["description"])
         st.write(f"**Deadline:** {m['deadline']}")
         st.write(f"**Dificultad:** {m['difficulty']}")
 
-        if st.button(f"✔ Completar misión {i}"):
-            missions.complete_mission("daily", i)
-            st.success("¡Misión completada!")
-            st.experimental_rerun()
+        if m["status"] == "pending":
+            st.button(
+                "✔ Completar misión",
+                key=f"complete_{m['id']}",
+                on_click=complete,
+                args=(m["id"],)
+            )
 
 # -----------------------------------------------------------
 # MAPA DEL MUNDO
@@ -243,9 +255,9 @@ for realm, info in realms.items():
 st.markdown("---")
 st.markdown("## 📜 Eventos Recientes")
 
-events = stats.data.get("events", [])
+events = world.events.tail(5)
 
-for ev in events[-5:]:
+for ev in events:
     st.write(f"**[{ev['date']}]** {ev.get('description', ev.get('name', 'Evento'))}")
 
 # -----------------------------------------------------------
@@ -254,8 +266,9 @@ for ev in events[-5:]:
 st.markdown("---")
 st.markdown("## 🗃️ Memoria del Sistema")
 
-latest_backup = memory.auto_backup()
-st.write(latest_backup)
+# los backups diarios los crea el scheduler; aquí solo se muestra el último
+last_runs = memory.load_memory().get("scheduler", {}).get("last_run", {})
+st.write(f"Último backup automático: {last_runs.get('backup', 'nunca')}")
 
 if st.button("Crear Backup Manual"):
     memory.manual_backup("manual_backup")
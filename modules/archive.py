@@ -0,0 +1,184 @@
+import gzip
+import os
+import zlib
+from pathlib import Path
+
+from modules import serializer
+from modules.history import HistoryLog
+from modules.state import atomic_write_bytes
+
+GZIP_MAGIC = b"\x1f\x8b\x08"
+
+
+def gzip_members(raw):
+    """
+    Yield (start, end, text) for each gzip member in `raw`; a member that
+    doesn't decompress whole (torn by a crash mid-append) yields text=None
+    and reading resumes at the next gzip header after it.
+    """
+    pos = 0
+    while pos < len(raw):
+        d = zlib.decompressobj(wbits=31)
+        try:
+            text = d.decompress(raw[pos:])
+            ok = d.eof
+        except zlib.error:
+            ok = False
+        if ok:
+            end = len(raw) - len(d.unused_data)
+            yield pos, end, text.decode("utf-8")
+            pos = end
+            continue
+
+        nxt = raw.find(GZIP_MAGIC, pos + 1)
+        end = nxt if nxt >= 0 else len(raw)
+        yield pos, end, None
+        pos = end
+
+
+class ArchiveLog(HistoryLog):
+    """
+    Cold tier for records that left the state document for good (settled
+    missions). Same monthly layout as HistoryLog, but segments are gzip
+    JSON-lines under `<data dir>/archive/<name>/YYYY-MM.jsonl.gz`.
+
+    Each append adds one gzip member to the segment (concatenated members
+    are a valid gzip stream), so writes stay O(batch). A member torn by a
+    crash is cut off before the next append and skipped by readers, so it
+    never hides the members after it. Reads are lazy: iter_records() opens
+    only the months in range.
+    """
+
+    # which field of a record decides its monthly segment
+    DATE_FIELDS = {"missions": "created_at"}
+
+    @classmethod
+    def for_store(cls, store, name):
+        """Shared archive `name` next to `store`'s file (in memory for MemoryStore)."""
+        date_field = cls.DATE_FIELDS.get(name, "date")
+
+        if not store.shared:
+            log = store.open_history(f"archive/{name}")
+            log.date_field = date_field
+            return log
+
+        key = (os.path.abspath(store.path), f"archive/{name}")
+        with cls._registry_lock:
+            log = cls._logs.get(key)
+            if log is None:
+                log = cls(Path(store.path).parent / "archive" / name, date_field)
+                cls._logs[key] = log
+        return log
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def segment_for(self, record):
+        date = str(record.get(self.date_field) or "")
+        month = date[:7] if len(date) >= 7 else "undated"
+        return self.directory / f"{month}.jsonl.gz"
+
+    def write(self, records):
+        if not records:
+            return
+
+        by_segment = {}
+        for r in records:
+            by_segment.setdefault(self.segment_for(r), []).append(r)
+
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for segment, rows in by_segment.items():
+                self.trim_torn_tail(segment)
+                text = "".join(serializer.dumps(r) + "\n" for r in rows)
+                with open(segment, "ab") as f:
+                    f.write(gzip.compress(text.encode("utf-8")))
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    def trim_torn_tail(self, segment):
+        """Cut `segment` back to the end of its last complete gzip member."""
+        try:
+            raw = segment.read_bytes()
+        except FileNotFoundError:
+            return
+
+        keep = 0
+        for _, end, text in gzip_members(raw):
+            if text is not None:
+                keep = end
+        if keep == len(raw):
+            return
+
+        with open(segment, "rb+") as f:
+            f.truncate(keep)
+            f.flush()
+            os.fsync(f.fileno())
+
+    def remove(self, record):
+        segment = self.segment_for(record)
+        if not segment.exists():
+            return False
+
+        with self.lock:
+            records = self.read_segment(segment)
+            if record not in records:
+                return False
+            records.remove(record)
+
+            text = "".join(serializer.dumps(r) + "\n" for r in records)
+            atomic_write_bytes(str(segment), gzip.compress(text.encode("utf-8")))
+        return True
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def month_of(self, segment):
+        return segment.name[:-len(".jsonl.gz")]
+
+    def segments(self):
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.jsonl.gz"))
+
+    def iter_segment(self, segment):
+        try:
+            raw = segment.read_bytes()
+        except FileNotFoundError:
+            return
+
+        for _, _, text in gzip_members(raw):
+            if text is None:
+                # torn member: its records never left the document
+                continue
+            for line in text.splitlines():
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    yield serializer.loads(line)
+                except ValueError:
+                    continue
+
+    def read_segment(self, segment):
+        return list(self.iter_segment(segment))
+
+    def iter_records(self, since=None, until=None):
+        """Lazily yield records in range (same bounds as read())."""
+        for segment in self.segments():
+            month = self.month_of(segment)
+            if since and month != "undated" and month < since[:7]:
+                continue
+            if until and month != "undated" and month > until[:7]:
+                continue
+
+            for r in self.iter_segment(segment):
+                date = str(r.get(self.date_field) or "")
+                if since and date[:len(since)] < since:
+                    continue
+                if until and date[:len(until)] > until:
+                    continue
+                yield r
+
+    def read(self, since=None, until=None):
+        return list(self.iter_records(since, until))
@@ -1,26 +1,22 @@
-import json
-from datetime import datetime, timedelta
-import random
+from datetime import timedelta
+
+from modules.state import StateStore, transactional
 
 
 class BossManager:
     def __init__(self, memory_path="data/system_memory.json"):
         self.path = memory_path
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
 
     # ----------------------------------------------------------
     # BASIC MEMORY OPERATIONS
     # ----------------------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # ----------------------------------------------------------
     # BOSS DEFINITIONS
@@ -111,8 +107,8 @@ class BossManager:
             "phase": 1,
             "current_hp": bosses[boss_name]["phases"][0]["hp"],
             "total_phases": 3,
-            "start_date": datetime.now().strftime("%Y-%m-%d"),
-            "expires": (datetime.now() + timedelta(days=30)).strftime("%Y-%m-%d")
+            "start_date": self.store.now().strftime("%Y-%m-%d"),
+            "expires": (self.store.now() + timedelta(days=30)).strftime("%Y-%m-%d")
         }
 
         self.save_memory()
@@ -121,6 +117,7 @@ class BossManager:
     # ----------------------------------------------------------
     # BOSS ATTACK (BASED ON EMOTION)
     # ----------------------------------------------------------
+    @transactional
     def boss_attack(self):
         """Boss reacts to your emotional state."""
         boss_state = self.get_current_boss()
@@ -147,7 +144,8 @@ class BossManager:
             sm = StatsManager(self.path)
             sm.add_effect(
                 name=f"Ataque de {phase['name']}",
-                duration_days=1,
+                effect_type="debuff",
+                duration_hours=24,
                 modifiers=phase["debuff"]
             )
             return f"⚠ {phase['attack_description']} (Ataque activado)"
@@ -157,6 +155,7 @@ class BossManager:
     # ----------------------------------------------------------
     # PLAYER DAMAGES THE BOSS
     # ----------------------------------------------------------
+    @transactional
     def damage_boss(self, amount):
         boss_state = self.get_current_boss()
         if not boss_state:
@@ -193,7 +192,8 @@ class BossManager:
         sm.add_exp(300)
         sm.add_effect(
             name="Victoria Heroica",
-            duration_days=5,
+            effect_type="buff",
+            duration_hours=5 * 24,
             modifiers={"wisdom": +2, "charisma": +1}
         )
 
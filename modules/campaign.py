@@ -0,0 +1,235 @@
+import argparse
+import copy
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from modules import serializer
+from modules.bosses import BossManager
+from modules.context import GameContext, SimClock
+from modules.curse import CurseManager
+from modules.memory_store import MemoryStore
+from modules.missions import MissionManager
+from modules.stats import EMOTIONS, StatsManager
+from modules.world import WorldManager
+
+
+# ----------------------------------------------------------
+# CAMPAIGN SETTINGS
+# ----------------------------------------------------------
+DEFAULT_CONFIG = {
+    "days": 30,
+    "start": "2025-01-06",           # a Monday: weekly missions on day 0, 7, ...
+    "boss": "Beso de la Bruja",
+    "boss_hp_scale": 1.0,            # multiplies every phase's HP
+    "curse_cooldown_hours": 12,
+    "completion_rate": 0.7,          # chance the player finishes each pending mission
+    "damage_per_difficulty": 4,      # boss HP removed per point of mission difficulty
+    "emotion_drift": 8,              # daily random walk of each emotion (±)
+    "emotion_recovery": 0.2,         # daily pull back toward the starting emotions
+}
+
+
+class CampaignBossManager(BossManager):
+    """BossManager with every phase's HP scaled for tuning runs."""
+
+    def __init__(self, store, hp_scale=1.0):
+        self.hp_scale = hp_scale
+        super().__init__(store)
+
+    def define_bosses(self):
+        bosses = super().define_bosses()
+        for boss in bosses.values():
+            for phase in boss["phases"]:
+                phase["hp"] = max(1, round(phase["hp"] * self.hp_scale))
+        return bosses
+
+
+# ----------------------------------------------------------
+# ONE TRAJECTORY
+# ----------------------------------------------------------
+def prepare_state(state, config):
+    """Fresh campaign document: no missions/effects, curse reset to idle."""
+    data = copy.deepcopy(state)
+    data["missions"] = {t: [] for t in ("daily", "weekly", "side_quests", "main_quest")}
+    data["effects"] = []
+    for name in ("events", "logs", "effects_history"):
+        data.pop(name, None)
+
+    curse = data.setdefault("curse", {})
+    curse.update({
+        "active": False,
+        "intensity": 1,
+        "last_trigger": None,
+        "cooldown_hours": config["curse_cooldown_hours"],
+    })
+    return data
+
+
+def drift_emotions(emotion, baseline, config, rng):
+    drift = config["emotion_drift"]
+    recovery = config["emotion_recovery"]
+    for key in EMOTIONS:
+        value = emotion.get(key, 0)
+        value += rng.randint(-drift, drift)
+        value += round((baseline.get(key, value) - value) * recovery)
+        emotion[key] = max(0, min(100, value))
+
+
+def run_trajectory(seed, config=None, initial_state=None):
+    """
+    Play `config["days"]` days of the game loop on an in-memory copy of
+    `initial_state`, drawing every random number from `seed`. Returns the
+    outcome of the run; the same seed always replays the same run.
+    """
+    config = {**DEFAULT_CONFIG, **(config or {})}
+
+    clock = SimClock(datetime.strptime(config["start"], "%Y-%m-%d"))
+    clock.set(0, 8)
+    context = GameContext(seed, clock)
+    rng = context.rng
+
+    store = MemoryStore(prepare_state(initial_state or {}, config), context)
+    missions = MissionManager(store)
+    stats = StatsManager(store)
+    curse = CurseManager(store)
+    world = WorldManager(store)
+    bosses = CampaignBossManager(store, config["boss_hp_scale"])
+
+    data = store.data
+    baseline = {k: data["emotion"].get(k, 0) for k in EMOTIONS}
+    bosses.start_boss_battle(config["boss"])
+
+    result = {
+        "seed": seed,
+        "defeated_day": None,
+        "curse_days": [],
+        "completed": 0,
+        "failed": 0,
+    }
+
+    for day in range(config["days"]):
+        # morning: yesterday's leftovers fail, new missions and world event
+        clock.set(day, 9)
+        result["failed"] += len(missions.fail_expired_missions())
+
+        if day % 7 == 0:
+            missions.cleanup_missions()
+            missions.generate_weekly_missions()
+        missions.generate_daily_missions()
+        world.generate_random_world_event()
+        drift_emotions(data["emotion"], baseline, config, rng)
+
+        if curse.try_auto_trigger():
+            result["curse_days"].append(day)
+
+        # evening: the player works through the pending missions
+        clock.set(day, 20)
+        for mtype in ("daily", "weekly"):
+            for m in data["missions"][mtype]:
+                if m["status"] != "pending" or rng.random() >= config["completion_rate"]:
+                    continue
+
+                missions.complete_mission(m["id"])
+                result["completed"] += 1
+
+                if result["defeated_day"] is None:
+                    bosses.damage_boss(m["difficulty"] * config["damage_per_difficulty"])
+                    if data["bosses"].get("defeated"):
+                        result["defeated_day"] = day
+
+        if result["defeated_day"] is None:
+            bosses.boss_attack()
+        stats.compact_effects()
+
+    boss = data["bosses"]
+    result.update({
+        "curse_triggers": len(result["curse_days"]),
+        "boss_phase": min(boss["phase"], boss["total_phases"]),
+        "boss_hp": boss["current_hp"],
+        "level": data["stats"]["level"],
+        "dark_points": data.get("dark_points", 0),
+    })
+    return result
+
+
+# ----------------------------------------------------------
+# MANY TRAJECTORIES
+# ----------------------------------------------------------
+def run_campaigns(runs, config=None, seed=0, workers=None, initial_state=None,
+                  state_path="data/system_memory.json"):
+    """
+    Run `runs` trajectories with seeds seed, seed+1, ... across a process
+    pool (workers=1 runs inline). Results come back in seed order.
+    """
+    if initial_state is None:
+        initial_state = serializer.load_file(state_path)
+
+    job = functools.partial(run_trajectory, config=config, initial_state=initial_state)
+    seeds = range(seed, seed + runs)
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return [job(s) for s in seeds]
+
+    chunksize = max(1, runs // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(job, seeds, chunksize=chunksize))
+
+
+def summarize(results, days=None):
+    """Distributions of time-to-defeat and curse frequency over many runs."""
+    defeated = np.array([r["defeated_day"] for r in results if r["defeated_day"] is not None])
+    curses = np.array([r["curse_triggers"] for r in results])
+    days = days or DEFAULT_CONFIG["days"]
+
+    def percentiles(values):
+        if not len(values):
+            return None
+        p10, p50, p90 = np.percentile(values, [10, 50, 90])
+        return {"mean": float(values.mean()), "p10": float(p10), "p50": float(p50), "p90": float(p90)}
+
+    return {
+        "runs": len(results),
+        "defeat_rate": len(defeated) / len(results) if results else 0.0,
+        "days_to_defeat": percentiles(defeated + 1),
+        "curse_triggers": percentiles(curses),
+        "curses_per_week": float(curses.mean() * 7 / days) if results else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo campaign simulator for the Isekai system.")
+    parser.add_argument("--runs", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--state", default="data/system_memory.json")
+    parser.add_argument("--days", type=int, default=DEFAULT_CONFIG["days"])
+    parser.add_argument("--boss", default=DEFAULT_CONFIG["boss"])
+    parser.add_argument("--hp-scale", type=float, default=DEFAULT_CONFIG["boss_hp_scale"])
+    parser.add_argument("--cooldown", type=float, default=DEFAULT_CONFIG["curse_cooldown_hours"])
+    parser.add_argument("--completion-rate", type=float, default=DEFAULT_CONFIG["completion_rate"])
+    args = parser.parse_args()
+
+    config = {
+        "days": args.days,
+        "boss": args.boss,
+        "boss_hp_scale": args.hp_scale,
+        "curse_cooldown_hours": args.cooldown,
+        "completion_rate": args.completion_rate,
+    }
+    results = run_campaigns(args.runs, config, args.seed, args.workers, state_path=args.state)
+    summary = summarize(results, args.days)
+
+    print(f"{summary['runs']} runs, {args.days} days, seed {args.seed}")
+    print(f"defeat rate      {summary['defeat_rate']:.1%}")
+    for label, key in (("days to defeat", "days_to_defeat"), ("curse triggers", "curse_triggers")):
+        s = summary[key]
+        if s is None:
+            print(f"{label:16} -")
+        else:
+            print(f"{label:16} mean {s['mean']:.1f}  p10 {s['p10']:.0f}  p50 {s['p50']:.0f}  p90 {s['p90']:.0f}")
+    print(f"curses per week  {summary['curses_per_week']:.2f}")
@@ -0,0 +1,46 @@
+import random
+from datetime import datetime, timedelta
+
+
+class GameContext:
+    """
+    Source of randomness and time for the game managers.
+
+    Every store carries one (`store.context`) and managers only draw from
+    `store.rng` / `store.now()`, never from the `random` module or the
+    wall clock. Swapping the context seeds a run or fast-forwards it
+    without monkeypatching, and contexts are independent of each other,
+    so parallel simulations never share RNG state.
+    """
+
+    def __init__(self, seed=None, clock=None):
+        self.seed = seed
+        self.rng = random.Random(seed)
+        # wall clock by default; any zero-argument callable returning a datetime
+        self.clock = clock or datetime.now
+
+    def now(self):
+        return self.clock()
+
+    def reseed(self, seed):
+        self.seed = seed
+        self.rng.seed(seed)
+
+
+class SimClock:
+    """Fast-forwardable clock for simulations and benchmarks."""
+
+    def __init__(self, origin):
+        self.origin = origin
+        self.current = origin
+
+    def __call__(self):
+        return self.current
+
+    def set(self, day, hour=0):
+        """Jump to `hour` o'clock of day `day` counted from the origin."""
+        self.current = self.origin + timedelta(days=day, hours=hour)
+
+    def advance(self, **delta):
+        self.current += timedelta(**delta)
+        return self.current
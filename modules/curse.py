@@ -1,37 +1,46 @@
-import json
-from datetime import datetime, timedelta
-import random
+from modules.history import HistoryLog
+from modules.state import StateStore, transactional
+from modules.timestamps import format_time, parse
+
+
+# (risk points, condition) for try_auto_trigger(); conditions also work on
+# NumPy arrays (see modules.simulate)
+AUTO_TRIGGER_RISK = [
+    (20, lambda e: e["stress"] > 60),
+    (20, lambda e: e["anxiety"] > 60),
+    (20, lambda e: e["fatigue"] > 60),
+]
+AUTO_TRIGGER_DEFAULTS = {"stress": 50, "anxiety": 40, "fatigue": 40}
+AUTO_TRIGGER_MIN_CHANCE = 5
+AUTO_TRIGGER_MAX_CHANCE = 75
 
 class CurseManager:
     def __init__(self, memory_path="data/system_memory.json"):
         self.path = memory_path
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
+        self.logs = HistoryLog.for_store(self.store, "logs")
 
     # ----------------------------------------------------
     # BASE MEMORY OPS
     # ----------------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # ----------------------------------------------------
     # HELPERS
     # ----------------------------------------------------
     def now(self):
-        return datetime.now()
+        return self.store.now()
 
     def hours_since(self, timestamp):
         if timestamp is None:
             return 999
         try:
-            prev = datetime.strptime(timestamp, "%Y-%m-%d %H:%M")
+            prev = parse(timestamp)
             delta = self.now() - prev
             return delta.total_seconds() / 3600
         except:
@@ -50,6 +59,7 @@ class CurseManager:
     # ----------------------------------------------------
     # MAIN TRIGGER
     # ----------------------------------------------------
+    @transactional
     def trigger_curse(self, source="auto"):
         """
         Activa la maldición del Beso de la Bruja.
@@ -63,7 +73,7 @@ class CurseManager:
         curse["intensity"] = min(curse.get("intensity", 1) + 1, 5)
 
         # Marcar tiempo del trigger
-        curse["last_trigger"] = self.now().strftime("%Y-%m-%d %H:%M")
+        curse["last_trigger"] = format_time(self.now())
 
         # Registrar
         self.log_event(f"🔥 Maldición activada ({source}). Intensidad: {curse['intensity']}")
@@ -79,6 +89,7 @@ class CurseManager:
     # ----------------------------------------------------
     # APPLY STATS EFFECTS
     # ----------------------------------------------------
+    @transactional
     def apply_curse_effect(self, intensity):
         """
         Aplica efectos negativos basados en la intensidad.
@@ -144,21 +155,9 @@ class CurseManager:
         if not self.can_trigger():
             return False
 
-        emotion = self.data.get("emotion", {})
-        stress = emotion.get("stress", 50)
-        fatigue = emotion.get("fatigue", 40)
-        anxiety = emotion.get("anxiety", 40)
+        chance = self.auto_trigger_chance()
 
-        # riesgo base según estado emocional
-        risk = 0
-        risk += (stress > 60) * 20
-        risk += (anxiety > 60) * 20
-        risk += (fatigue > 60) * 20
-
-        # Mínimo siempre existe un 5% de probabilidad
-        chance = max(5, min(75, risk))
-
-        roll = random.randint(1, 100)
+        roll = self.store.rng.randint(1, 100)
 
         if roll <= chance:
             self.trigger_curse("auto-RNG")
@@ -166,6 +165,17 @@ class CurseManager:
         
         return False
 
+    def auto_trigger_chance(self):
+        """Porcentaje de activación automática según el estado emocional."""
+        emotion = self.data.get("emotion", {})
+        e = {k: emotion.get(k, d) for k, d in AUTO_TRIGGER_DEFAULTS.items()}
+
+        # riesgo base según estado emocional
+        risk = sum(points for points, condition in AUTO_TRIGGER_RISK if condition(e))
+
+        # Mínimo siempre existe un 5% de probabilidad
+        return max(AUTO_TRIGGER_MIN_CHANCE, min(AUTO_TRIGGER_MAX_CHANCE, risk))
+
     # ----------------------------------------------------
     # MANUAL CONTROL
     # ----------------------------------------------------
@@ -173,6 +183,7 @@ class CurseManager:
         """Activa la maldición manualmente desde admin."""
         return self.trigger_curse("manual")
 
+    @transactional
     def dispel(self):
         """
         Apaga la maldición completamente.
@@ -192,8 +203,7 @@ class CurseManager:
     # ----------------------------------------------------
     def log_event(self, text):
         log = {
-            "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
+            "date": format_time(self.now()),
             "entry": text
         }
-        self.data["logs"].append(log)
-        self.save_memory()
+        self.logs.append(log)
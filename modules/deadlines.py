@@ -0,0 +1,102 @@
+import heapq
+import threading
+
+from modules import timestamps
+
+
+class DeadlineIndex:
+    """
+    Deadline-ordered, id-addressable view over the `missions` dict of
+    the state document.
+
+    Pending missions sit in a min-heap keyed by their parsed deadline
+    (epoch seconds), so expiring them is O(expired log n) instead of a
+    scan over every mission of every type. Only `pending` missions can
+    expire, so only they are queued: a mission completed or failed
+    elsewhere simply drops out when it reaches the head of the heap.
+
+    `ids` maps every mission's stable id to (mission_type, mission), so
+    lookups by id are O(1) whatever the list positions are.
+
+    Like EffectIndex it never writes to the document; callers mutate
+    the missions and keep the index in step via push(). Heap changes
+    (including the ones reads make) run under `lock`.
+    """
+
+    def __init__(self, missions):
+        self.missions = missions
+        self.lists = {}
+        self.size = 0
+        self.heap = []
+        self.seq = 0
+        self.ids = {}
+        self.lock = threading.RLock()
+
+        for mtype, items in missions.items():
+            self.lists[mtype] = items
+            self.size += len(items)
+            for m in items:
+                if "id" in m:
+                    self.ids[m["id"]] = (mtype, m)
+                if m.get("status") == "pending":
+                    self.heap.append(self.entry(mtype, m))
+        heapq.heapify(self.heap)
+
+    def entry(self, mtype, mission):
+        self.seq += 1
+        return (timestamps.epoch(mission["deadline"]), self.seq, mtype, mission)
+
+    def tracks(self, missions):
+        """True while this index still mirrors `missions` (same lists, same sizes)."""
+        if self.missions is not missions or len(missions) != len(self.lists):
+            return False
+        if any(missions.get(t) is not items for t, items in self.lists.items()):
+            return False
+        return sum(len(items) for items in missions.values()) == self.size
+
+    # ----------------------------------------------------------
+    # UPDATES
+    # ----------------------------------------------------------
+    def push(self, mtype, mission):
+        """Index a mission that was just appended to `missions[mtype]`."""
+        with self.lock:
+            self.size += 1
+            if "id" in mission:
+                self.ids[mission["id"]] = (mtype, mission)
+            if mission.get("status") == "pending":
+                heapq.heappush(self.heap, self.entry(mtype, mission))
+
+    def drop_settled(self):
+        """Discard heap heads that are no longer pending."""
+        with self.lock:
+            while self.heap and self.heap[0][3].get("status") != "pending":
+                heapq.heappop(self.heap)
+
+    def pop_expired(self, now):
+        """Remove and return (type, mission) for pending missions past their deadline."""
+        now_ts = now.timestamp()
+        expired = []
+        with self.lock:
+            while self.heap:
+                self.drop_settled()
+                if not self.heap or self.heap[0][0] >= now_ts:
+                    break
+                _, _, mtype, mission = heapq.heappop(self.heap)
+                expired.append((mtype, mission))
+        return expired
+
+    # ----------------------------------------------------------
+    # QUERIES
+    # ----------------------------------------------------------
+    def find(self, mission_id):
+        """(mission_type, mission) for `mission_id`, or None."""
+        return self.ids.get(mission_id)
+
+    def next_deadline(self):
+        """datetime of the earliest pending deadline, or None."""
+        with self.lock:
+            self.drop_settled()
+            if not self.heap:
+                return None
+            deadline = self.heap[0][3]["deadline"]
+        return timestamps.parse(deadline)
@@ -1,29 +1,28 @@
-import json
-from datetime import datetime
+from modules.history import HistoryLog
+from modules.state import StateStore, transactional
+from modules.timestamps import format_time
 
 
 class DomainManager:
     def __init__(self, memory_path="data/system_memory.json"):
         self.path = memory_path
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
+        self.logs = HistoryLog.for_store(self.store, "logs")
 
     # -------------------------------------------------------
     # BASIC MEMORY OPERATIONS
     # -------------------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # -------------------------------------------------------
     # ADD EXP TO DOMAIN
     # -------------------------------------------------------
+    @transactional
     def add_exp(self, domain, amount):
         """Adds EXP to a domain and manages level ups and unlocks."""
         d = self.data["domains"][domain]
@@ -66,8 +65,8 @@ class DomainManager:
             d["unlocked"].append(str_level)
 
             # Add log entry
-            self.data["logs"].append({
-                "date": datetime.now().strftime("%Y-%m-%d"),
+            self.logs.append({
+                "date": self.store.now().strftime("%Y-%m-%d"),
                 "entry": f"[DOMINIO] {d['name']} alcanzó el hito: {event}"
             })
 
@@ -85,7 +84,7 @@ class DomainManager:
     # -------------------------------------------------------
     def update_map(self, domain, event_name):
         """Marks areas as active/discovered when unlocking new levels."""
-        now = datetime.now().strftime("%Y-%m-%d %H:%M")
+        now = format_time(self.store.now())
 
         if "map" not in self.data:
             self.data["map"] = {
@@ -124,6 +123,7 @@ class DomainManager:
     # -------------------------------------------------------
     # WEEKLY MILESTONES (COMPLETE)
     # -------------------------------------------------------
+    @transactional
     def complete_weekly_objective(self, domain, index):
         try:
             obj = self.data["domains"][domain]["weekly_dynamic_milestones"][index]
@@ -133,8 +133,8 @@ class DomainManager:
             self.add_exp(domain, 20)
 
             # Log entry
-            self.data["logs"].append({
-                "date": datetime.now().strftime("%Y-%m-%d"),
+            self.logs.append({
+                "date": self.store.now().strftime("%Y-%m-%d"),
                 "entry": f"Objetivo semanal completado en {domain}: {obj['task']}"
             })
 
@@ -146,13 +146,14 @@ class DomainManager:
     # -------------------------------------------------------
     # CLEAN WEEKLY MILESTONES
     # -------------------------------------------------------
+    @transactional
     def clear_weekly(self):
         """Resets weekly tasks for a fresh weekly cycle."""
         for domain_key in self.data["domains"]:
             self.data["domains"][domain_key]["weekly_dynamic_milestones"] = []
 
-        self.data["logs"].append({
-            "date": datetime.now().strftime("%Y-%m-%d"),
+        self.logs.append({
+            "date": self.store.now().strftime("%Y-%m-%d"),
             "entry": "Reset semanal de objetivos dinámicos."
         })
 
@@ -1,26 +1,20 @@
-import json
-import random
-from datetime import datetime, timedelta
+from modules.state import StateStore
 
 
 class DynamicMilestones:
     def __init__(self, memory_path="data/system_memory.json"):
         self.path = memory_path
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
 
     # --------------------------------------------
     # BASIC MEMORY OPERATIONS
     # --------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # --------------------------------------------
     # WEEKLY MILESTONE GENERATION LOGIC
@@ -107,7 +101,7 @@ class DynamicMilestones:
     # --------------------------------------------
     def generate_weekly_milestones(self):
         """Generate new random milestones for each domain."""
-        now = datetime.now().strftime("%Y-%m-%d")
+        now = self.store.now().strftime("%Y-%m-%d")
 
         for domain_key, domain_data in self.data["domains"].items():
 
@@ -116,7 +110,7 @@ class DynamicMilestones:
                 continue
 
             # choose 2–3 objectives randomly
-            selected = random.sample(candidates, k=min(3, len(candidates)))
+            selected = self.store.rng.sample(candidates, k=min(3, len(candidates)))
 
             self.data["domains"][domain_key]["weekly_dynamic_milestones"] = [
                 {
@@ -0,0 +1,106 @@
+import heapq
+import threading
+from datetime import datetime
+
+from modules import statvec, timestamps
+
+
+class EffectIndex:
+    """
+    Expiry-ordered view over the `effects` list of the state document.
+
+    Live effects sit in a min-heap keyed by their parsed expiry (epoch
+    seconds, parsed once when the effect enters the index), so finding
+    what expired is O(k log n) instead of a strptime over every effect on
+    every read. Evicted effects wait in `expired` until compaction removes
+    them from the document; the document itself is never touched here.
+
+    `totals` is the running stat vector of the live effects' modifiers
+    (each effect is vectorized once on entry): added on push, subtracted
+    on eviction, so reading it is O(stats).
+
+    The index lives on the process-wide store and reads evict, so every
+    heap change runs under `lock` (Streamlit sessions are threads).
+    """
+
+    def __init__(self, effects):
+        self.effects = effects
+        self.heap = []
+        self.expired = []
+        self.seq = 0
+        self.totals = statvec.zeros()
+        self.lock = threading.RLock()
+
+        for e in effects:
+            vec = statvec.from_dict(e.get("modifiers", {}))
+            self.heap.append((self.expiry_of(e), self.next_seq(), e, vec))
+            statvec.add(self.totals, vec)
+        heapq.heapify(self.heap)
+
+    @staticmethod
+    def expiry_of(effect):
+        return timestamps.epoch(effect["expires_at"])
+
+    def next_seq(self):
+        self.seq += 1
+        return self.seq
+
+    def tracks(self, effects):
+        """True while this index still mirrors `effects` (same list, same size)."""
+        return self.effects is effects and len(self.heap) + len(self.expired) == len(effects)
+
+    # ----------------------------------------------------------
+    # UPDATES
+    # ----------------------------------------------------------
+    def push(self, effect):
+        """Index an effect that was just appended to the document list."""
+        vec = statvec.from_dict(effect.get("modifiers", {}))
+        with self.lock:
+            heapq.heappush(self.heap, (self.expiry_of(effect), self.next_seq(), effect, vec))
+            statvec.add(self.totals, vec)
+
+    def evict(self, now=None):
+        """Pop every effect that expired by `now`; returns the newly expired."""
+        now_ts = (now or datetime.now()).timestamp()
+        popped = []
+        with self.lock:
+            while self.heap and self.heap[0][0] <= now_ts:
+                _, _, effect, vec = heapq.heappop(self.heap)
+                statvec.add(self.totals, vec, -1)
+                popped.append(effect)
+            self.expired.extend(popped)
+        return popped
+
+    def take_expired(self, now=None):
+        """Evict, then hand over (and forget) all expired effects for compaction."""
+        with self.lock:
+            self.evict(now)
+            expired, self.expired = self.expired, []
+        return expired
+
+    def rebind(self, effects):
+        """Point the index at the compacted list that replaced the old one."""
+        self.effects = effects
+
+    # ----------------------------------------------------------
+    # QUERIES
+    # ----------------------------------------------------------
+    def active(self, now=None):
+        """Live effects in document order."""
+        with self.lock:
+            self.evict(now)
+            if not self.expired:
+                return list(self.effects)
+
+            gone = {id(e) for e in self.expired}
+            return [e for e in self.effects if id(e) not in gone]
+
+    def modifier_vector(self, now=None):
+        """Summed modifiers of the live effects (a copy of the running total)."""
+        with self.lock:
+            self.evict(now)
+            return statvec.total(self.totals)
+
+    def next_expiry(self):
+        """Epoch seconds of the next effect to expire, or None."""
+        return self.heap[0][0] if self.heap else None
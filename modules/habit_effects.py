@@ -0,0 +1,141 @@
+from modules import statvec
+
+
+# domain EXP threshold growth per level (same curve as stats/domains)
+DOMAIN_GROWTH = 1.35
+
+
+class HabitPlan:
+    """
+    One habit's `effects` resolved against the state document once:
+    stat deltas as a statvec vector (plus any stat outside statvec's
+    fields), emotion deltas and domain EXP, each already matched to the
+    table it lands in. Keys that match no table are dropped here instead
+    of being re-checked on every toggle.
+    """
+
+    def __init__(self, habit_id, effects, stat_keys, emotion_keys, domain_keys):
+        self.habit_id = habit_id
+        self.stats = statvec.zeros()
+        self.extra_stats = []     # [(stat, delta)] statvec can't hold (unknown or non-int)
+        self.emotion = []         # [(emotion, delta)]
+        self.domains = []         # [(domain, exp)]
+
+        for key, value in effects.items():
+            if key in stat_keys:
+                i = statvec.INDEX.get(key)
+                if i is None or not isinstance(value, int):
+                    self.extra_stats.append((key, value))
+                else:
+                    self.stats[i] += value
+            elif key in emotion_keys:
+                self.emotion.append((key, value))
+            elif key == "domains":
+                self.domains = [(d, v) for d, v in value.items() if d in domain_keys]
+
+        # only the touched slots are walked when applying
+        self.stat_fields = [(name, i) for name, i in statvec.INDEX.items() if self.stats[i]]
+
+
+def target_signature(system):
+    """The stat/emotion/domain keys plans resolve against (a few dozen keys)."""
+    return (
+        tuple(system.get("stats", {})),
+        tuple(system.get("emotion", {})),
+        tuple(system.get("domains", {})),
+    )
+
+
+def compile_plans(definitions, system):
+    """{habit_id: HabitPlan} for every definition."""
+    stat_keys = set(system.get("stats", {}))
+    emotion_keys = set(system.get("emotion", {}))
+    domain_keys = set(system.get("domains", {}))
+    return {
+        h["id"]: HabitPlan(h["id"], h.get("effects", {}), stat_keys, emotion_keys, domain_keys)
+        for h in definitions
+    }
+
+
+# ----------------------------------------------------------
+# APPLYING
+# ----------------------------------------------------------
+def gain_domain_exp(domain, amounts):
+    """
+    Add each EXP amount in order, levelling up like a habit toggle does
+    (EXP back to 0, threshold x1.35). Locals only inside the loop.
+    """
+    exp, level, nxt = domain["exp"], domain["level"], domain["exp_to_next"]
+    for amount in amounts:
+        exp += amount
+        if exp >= nxt:
+            exp = 0
+            level += 1
+            nxt = int(nxt * DOMAIN_GROWTH)
+    domain["exp"], domain["level"], domain["exp_to_next"] = exp, level, nxt
+
+
+def apply_plan(plan, system):
+    """Apply one completion of `plan` to the system document."""
+    stats = system.get("stats", {})
+    for name, i in plan.stat_fields:
+        stats[name] += plan.stats[i]
+    for name, value in plan.extra_stats:
+        stats[name] += value
+
+    emotion = system.get("emotion", {})
+    for name, value in plan.emotion:
+        emotion[name] += value
+
+    domains = system.get("domains", {})
+    for name, exp in plan.domains:
+        gain_domain_exp(domains[name], (exp,))
+
+
+def apply_plans(plans, completions, system):
+    """
+    Apply a batch of completions ([habit_id, ...] oldest first) in one
+    pass: stat and emotion deltas are summed as vectors and written once,
+    domain EXP is replayed in order per domain so level-ups land exactly
+    as if each day had been toggled.
+    """
+    counts = {}
+    for habit_id in completions:
+        if habit_id in plans:
+            counts[habit_id] = counts.get(habit_id, 0) + 1
+
+    total = statvec.zeros()
+    extra = {}
+    emotion_delta = {}
+    for habit_id, n in counts.items():
+        plan = plans[habit_id]
+        for name, i in plan.stat_fields:
+            total[i] += plan.stats[i] * n
+        for name, value in plan.extra_stats:
+            extra[name] = extra.get(name, 0) + value * n
+        for name, value in plan.emotion:
+            emotion_delta[name] = emotion_delta.get(name, 0) + value * n
+
+    stats = system.get("stats", {})
+    for name, i in statvec.INDEX.items():
+        if total[i]:
+            stats[name] += total[i]
+    for name, value in extra.items():
+        stats[name] += value
+
+    emotion = system.get("emotion", {})
+    for name, value in emotion_delta.items():
+        emotion[name] += value
+
+    # per-domain EXP stream in completion order
+    streams = {}
+    for habit_id in completions:
+        plan = plans.get(habit_id)
+        if plan is None:
+            continue
+        for name, exp in plan.domains:
+            streams.setdefault(name, []).append(exp)
+
+    domains = system.get("domains", {})
+    for name, amounts in streams.items():
+        gain_domain_exp(domains[name], amounts)
@@ -0,0 +1,167 @@
+from datetime import date, timedelta
+
+import numpy as np
+
+
+def day_ordinal(day):
+    """Ordinal of a date, datetime or "YYYY-MM-DD" string."""
+    if isinstance(day, str):
+        return date.fromisoformat(day[:10]).toordinal()
+    if hasattr(day, "date"):
+        day = day.date()
+    return day.toordinal()
+
+
+class HabitLog:
+    """
+    Columnar habit log: one bitset per habit, bit i = "done on day
+    origin + i". Bitsets are plain Python ints, so counting a range is a
+    shift, a mask and int.bit_count() — O(days/64) machine words whatever
+    the number of days — and matrix() unpacks a range into a NumPy bool
+    matrix (habits x days) in one call.
+
+    Persisted as {"origin": "YYYY-MM-DD", "bits": {habit_id: hex}} inside
+    the habits document; the old {date: {habit_id: bool}} layout is only
+    produced by to_daily_log() for export.
+    """
+
+    def __init__(self, origin=None, bits=None):
+        self.origin = origin          # ordinal of bit 0 (None while empty)
+        self.bits = bits or {}
+
+    # ----------------------------------------------------------
+    # (DE)SERIALIZATION
+    # ----------------------------------------------------------
+    @classmethod
+    def from_json(cls, doc):
+        if not doc or not doc.get("origin"):
+            return cls()
+        bits = {h: int(x, 16) for h, x in doc.get("bits", {}).items()}
+        return cls(day_ordinal(doc["origin"]), bits)
+
+    def to_json(self):
+        if self.origin is None:
+            return {"origin": None, "bits": {}}
+        return {"origin": self.day_str(0), "bits": {h: self.hex(h) for h in self.bits}}
+
+    def hex(self, habit_id):
+        return format(self.bits.get(habit_id, 0), "x")
+
+    @classmethod
+    def from_daily_log(cls, daily_log):
+        log = cls()
+        for day, habits in daily_log.items():
+            for habit_id, done in habits.items():
+                if done:
+                    log.set(habit_id, day, True)
+        return log
+
+    def to_daily_log(self):
+        """Export in the legacy {date: {habit_id: True}} JSON layout."""
+        out = {}
+        for habit_id, bits in self.bits.items():
+            i = 0
+            while bits:
+                if bits & 1:
+                    out.setdefault(self.day_str(i), {})[habit_id] = True
+                bits >>= 1
+                i += 1
+        return dict(sorted(out.items()))
+
+    def day_str(self, i):
+        return date.fromordinal(self.origin + i).isoformat()
+
+    # ----------------------------------------------------------
+    # POINT ACCESS
+    # ----------------------------------------------------------
+    def offset(self, day):
+        """Bit index of `day`, moving the origin back if it is earlier."""
+        ordinal = day_ordinal(day)
+        if self.origin is None:
+            self.origin = ordinal
+        elif ordinal < self.origin:
+            shift = self.origin - ordinal
+            self.bits = {h: b << shift for h, b in self.bits.items()}
+            self.origin = ordinal
+        return ordinal - self.origin
+
+    def get(self, habit_id, day):
+        if self.origin is None:
+            return False
+        i = day_ordinal(day) - self.origin
+        return i >= 0 and bool(self.bits.get(habit_id, 0) >> i & 1)
+
+    def set(self, habit_id, day, done):
+        i = self.offset(day)
+        bits = self.bits.get(habit_id, 0)
+        self.bits[habit_id] = bits | (1 << i) if done else bits & ~(1 << i)
+
+    def toggle(self, habit_id, day):
+        done = not self.get(habit_id, day)
+        self.set(habit_id, day, done)
+        return done
+
+    # ----------------------------------------------------------
+    # RANGE QUERIES (start/end inclusive)
+    # ----------------------------------------------------------
+    def window(self, habit_id, start, end):
+        """Bits of `habit_id` for [start, end], bit 0 = start."""
+        if self.origin is None:
+            return 0
+        lo = day_ordinal(start) - self.origin
+        n = day_ordinal(end) - day_ordinal(start) + 1
+        if n <= 0:
+            return 0
+        bits = self.bits.get(habit_id, 0)
+        bits = bits >> lo if lo >= 0 else bits << -lo
+        return bits & ((1 << n) - 1)
+
+    def count(self, habit_id, start, end):
+        return self.window(habit_id, start, end).bit_count()
+
+    def completion_rate(self, habit_id, start, end):
+        days = day_ordinal(end) - day_ordinal(start) + 1
+        return self.count(habit_id, start, end) / days if days > 0 else 0.0
+
+    def matrix(self, start, end, habit_ids=None):
+        """NumPy bool matrix (habits x days) for [start, end]."""
+        habit_ids = list(self.bits) if habit_ids is None else list(habit_ids)
+        n = day_ordinal(end) - day_ordinal(start) + 1
+        if n <= 0 or not habit_ids:
+            return np.zeros((len(habit_ids), max(n, 0)), dtype=bool)
+
+        nbytes = (n + 7) // 8
+        raw = b"".join(
+            self.window(h, start, end).to_bytes(nbytes, "little") for h in habit_ids
+        )
+        packed = np.frombuffer(raw, dtype=np.uint8).reshape(len(habit_ids), nbytes)
+        return np.unpackbits(packed, axis=1, bitorder="little")[:, :n].astype(bool)
+
+    def daily_counts(self, start, end):
+        """Habits completed per day in [start, end]."""
+        return self.matrix(start, end).sum(axis=0)
+
+    @staticmethod
+    def longest_run(bits):
+        """Length of the longest run of set bits (x &= x << 1 per step)."""
+        length = 0
+        while bits:
+            bits &= bits << 1
+            length += 1
+        return length
+
+    def longest_streak(self, habit_id):
+        return self.longest_run(self.bits.get(habit_id, 0))
+
+    def dates(self, habit_id, start, end):
+        """Days in [start, end] the habit was done."""
+        first = date.fromordinal(day_ordinal(start))
+        bits = self.window(habit_id, start, end)
+        days = []
+        i = 0
+        while bits:
+            if bits & 1:
+                days.append(first + timedelta(days=i))
+            bits >>= 1
+            i += 1
+        return days
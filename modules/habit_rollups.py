@@ -0,0 +1,126 @@
+from datetime import date, timedelta
+
+from modules.habit_log import day_ordinal
+
+
+PERIODS = ("day", "week", "month")
+
+
+def bucket_key(ordinal, period):
+    """"YYYY-MM-DD" (day), the week's Monday "YYYY-MM-DD" (week) or "YYYY-MM" (month)."""
+    d = date.fromordinal(ordinal)
+    if period == "day":
+        return d.isoformat()
+    if period == "week":
+        return (d - timedelta(days=d.weekday())).isoformat()
+    return d.isoformat()[:7]
+
+
+def bucket_keys(start, end, period):
+    """Every bucket touching [start, end], oldest first."""
+    lo, hi = day_ordinal(start), day_ordinal(end)
+    keys = []
+    if period == "day":
+        keys = [date.fromordinal(o).isoformat() for o in range(lo, hi + 1)]
+    elif period == "week":
+        first = lo - date.fromordinal(lo).weekday()
+        keys = [date.fromordinal(o).isoformat() for o in range(first, hi + 1, 7)]
+    else:
+        y, m = date.fromordinal(lo).year, date.fromordinal(lo).month
+        last = date.fromordinal(hi)
+        while (y, m) <= (last.year, last.month):
+            keys.append(f"{y:04d}-{m:02d}")
+            y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return keys
+
+
+def empty_entry():
+    return {"total": 0, "habits": {}, "weekdays": [0] * 7, "domains": {}}
+
+
+def add_entry(into, entry, sign=1):
+    into["total"] += sign * entry["total"]
+    for name in ("habits", "domains"):
+        for k, v in entry[name].items():
+            into[name][k] = into[name].get(k, 0) + sign * v
+    into["weekdays"] = [a + sign * b for a, b in zip(into["weekdays"], entry["weekdays"])]
+
+
+class HabitRollups:
+    """
+    Pre-aggregated habit completions per day, week (Monday) and month.
+    Each bucket holds the total, completions per habit, per weekday and
+    the domain EXP the habits' effects granted, so a chart over a month
+    or a year reads ~30 or 12 buckets whatever the length of the log.
+
+    Built once from the bitset log and then kept current by add() on
+    every toggle (O(1) per period). Domain EXP follows the definitions
+    in force when a day was recorded; rebuild after editing effects.
+    """
+
+    def __init__(self):
+        self.tables = {period: {} for period in PERIODS}
+
+    @classmethod
+    def from_log(cls, log, plans):
+        """Rollups of the whole log; domain EXP from compiled HabitPlans."""
+        rollups = cls()
+        if log.origin is None:
+            return rollups
+        for habit_id, bits in log.bits.items():
+            plan = plans.get(habit_id)
+            domains = dict(plan.domains) if plan else None
+            i = 0
+            while bits:
+                low = (bits & -bits).bit_length() - 1
+                i += low
+                rollups.add(habit_id, date.fromordinal(log.origin + i), domains)
+                bits >>= low + 1
+                i += 1
+        return rollups
+
+    def add(self, habit_id, day, domains=None, sign=1):
+        """Count (sign=1) or uncount (sign=-1) one completion of `habit_id`."""
+        ordinal = day_ordinal(day)
+        weekday = date.fromordinal(ordinal).weekday()
+        for period, table in self.tables.items():
+            key = bucket_key(ordinal, period)
+            entry = table.get(key)
+            if entry is None:
+                entry = table[key] = empty_entry()
+
+            entry["total"] += sign
+            entry["habits"][habit_id] = entry["habits"].get(habit_id, 0) + sign
+            entry["weekdays"][weekday] += sign
+            for d_key, d_value in (domains or {}).items():
+                entry["domains"][d_key] = entry["domains"].get(d_key, 0) + sign * d_value
+
+    # ----------------------------------------------------------
+    # RANGE QUERIES (start/end inclusive)
+    # ----------------------------------------------------------
+    def series(self, start, end, period="day"):
+        """[(bucket key, entry), ...] for every bucket touching [start, end], empty ones included."""
+        table = self.tables[period]
+        return [(key, table.get(key) or empty_entry()) for key in bucket_keys(start, end, period)]
+
+    def totals(self, start, end):
+        """
+        One entry aggregated over exactly [start, end]: whole months from
+        the month table, the partial months at either edge from days.
+        """
+        lo, hi = day_ordinal(start), day_ordinal(end)
+        out = empty_entry()
+        o = lo
+        while o <= hi:
+            d = date.fromordinal(o)
+            next_month = date(d.year + d.month // 12, d.month % 12 + 1, 1).toordinal()
+            if d.day == 1 and next_month - 1 <= hi:
+                entry = self.tables["month"].get(bucket_key(o, "month"))
+                o = next_month
+            else:
+                entry = self.tables["day"].get(d.isoformat())
+                o += 1
+            if entry:
+                add_entry(out, entry)
+        return out
+
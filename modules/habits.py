@@ -1,39 +1,123 @@
-import json
-import os
-from datetime import datetime, timedelta
+from contextlib import contextmanager
+from datetime import timedelta
+
+from modules.habit_effects import apply_plan, apply_plans, compile_plans, target_signature
+from modules.habit_log import HabitLog
+from modules.habit_rollups import HabitRollups
+from modules.state import StateStore
+from modules.streaks import StreakEngine
 
 class HabitsManager:
 
     def __init__(self, habits_path="data/habits.json", system_path="data/system_memory.json"):
         self.habits_path = habits_path
         self.system_path = system_path
-        self.habits = self.load_json(habits_path)
-        self.system = self.load_json(system_path)
+        # the system store carries the RNG/clock context
+        self.store = StateStore.open(system_path)
+        self.habits_store = StateStore.open(habits_path)
 
     # ---------------------------------------------------------
     # JSON HANDLING
     # ---------------------------------------------------------
+    @property
+    def habits(self):
+        """Live shared habits document (re-read only if the file changed)."""
+        return self.habits_store.load()
+
+    @property
+    def system(self):
+        """Live shared system document, the same one every other manager edits."""
+        return self.store.load()
+
+    @contextmanager
+    def transaction(self):
+        """
+        One unit of work over both documents: saves inside only mark them
+        dirty and each file is written at most once at the end.
+
+        The system document is flushed first (it's the one other managers
+        and processes also edit); if that fails, e.g. StaleStateError, the
+        habits changes are discarded too. Only if the habits write itself
+        fails afterwards is the system write already on disk; that error
+        reaches the caller.
+        """
+        with self.habits_store.transaction(), self.store.transaction():
+            yield
+
     def load_json(self, path):
-        if not os.path.exists(path):
-            return {}
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return StateStore.open(path).load()
 
     def save_json(self, path, data):
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        if path == self.habits_path:
+            # definitions may have been edited in place: recompile on next use
+            self.habits_store.cache.pop("effect_plans", None)
+        StateStore.open(path).save(data)
 
     # ---------------------------------------------------------
     # ACCESSORS
     # ---------------------------------------------------------
+    def section(self):
+        """Habit data: nested under "habits" when the file is a full state copy."""
+        return self.habits.get("habits", self.habits)
+
     def get_definitions(self):
-        return self.habits.get("definitions", [])
+        return self.section().get("definitions", [])
+
+    def habit_log(self):
+        """
+        Bitset log (modules.habit_log), decoded once and cached on the
+        habits store. A legacy `daily_log` dict is converted on first use.
+        """
+        store = self.habits_store
+        log = store.cache.get("habit_log")
+        if log is None:
+            section = self.section()
+            log = HabitLog.from_json(section.get("log"))
+            for day, habits in section.pop("daily_log", {}).items():
+                for habit_id, done in habits.items():
+                    if done:
+                        log.set(habit_id, day, True)
+            section["log"] = log.to_json()
+            store.cache["habit_log"] = log
+        return log
+
+    def store_bits(self, habit_id):
+        """Write one habit's bitset back into the document."""
+        log = self.habit_log()
+        doc = self.section()["log"]
+        if doc.get("origin") != log.day_str(0):
+            # origin moved back: every bitset shifted
+            self.section()["log"] = log.to_json()
+        else:
+            doc["bits"][habit_id] = log.hex(habit_id)
 
     def get_daily_log(self):
-        return self.habits.get("daily_log", {})
+        """{date: {habit_id: True}} export of the bitset log."""
+        return self.habit_log().to_daily_log()
+
+    def streak_engine(self):
+        """Streak runs (modules.streaks), built once from the bitsets and cached."""
+        store = self.habits_store
+        engine = store.cache.get("streaks")
+        if engine is None:
+            engine = StreakEngine.from_log(self.habit_log())
+            store.cache["streaks"] = engine
+        return engine
+
+    def habit_rollups(self):
+        """Day/week/month rollups (modules.habit_rollups), built once and cached."""
+        store = self.habits_store
+        rollups = store.cache.get("rollups")
+        if rollups is None:
+            rollups = HabitRollups.from_log(self.habit_log(), self.effect_plans())
+            store.cache["rollups"] = rollups
+        return rollups
 
     def get_streaks(self):
-        return self.habits.get("streaks", {})
+        """{habit_id: current streak in days}."""
+        engine = self.streak_engine()
+        today = self.store.now()
+        return {h["id"]: engine.current(h["id"], today) for h in self.get_definitions()}
 
     # ---------------------------------------------------------
     # REGISTER DAILY HABIT COMPLETION
@@ -42,31 +126,51 @@ class HabitsManager:
         """
         Marca o desmarca un hábito como hecho para una fecha.
         date_str debe ser "YYYY-MM-DD".
+        Una sola transacción: como mucho una escritura por archivo.
         """
+        with self.transaction():
+            log = self.habit_log()
+            # derived indexes are built from the log before it changes
+            self.streak_engine()
+            rollups = self.habit_rollups()
 
-        if "daily_log" not in self.habits:
-            self.habits["daily_log"] = {}
-
-        if date_str not in self.habits["daily_log"]:
-            self.habits["daily_log"][date_str] = {}
+            # Toggle
+            prev = log.get(habit_id, date_str)
+            log.set(habit_id, date_str, not prev)
+            self.store_bits(habit_id)
 
-        # Toggle
-        prev = self.habits["daily_log"][date_str].get(habit_id, False)
-        self.habits["daily_log"][date_str][habit_id] = not prev
+            self.update_streak(habit_id, date_str, not prev)
+            plan = self.effect_plans().get(habit_id)
+            rollups.add(
+                habit_id, date_str, dict(plan.domains) if plan else None,
+                sign=-1 if prev else 1,
+            )
 
-        self.update_streak(habit_id)
+            # Si se completó hoy, aplicar efectos
+            if not prev:
+                self.apply_habit_effect(habit_id)
 
-        # Si se completó hoy, aplicar efectos
-        if not prev:
-            self.apply_habit_effect(habit_id)
+            self.habits_store.save()
 
-        self.save_json(self.habits_path, self.habits)
-
-        return self.habits["daily_log"][date_str][habit_id]
+            return not prev
 
     # ---------------------------------------------------------
     # APPLY HABIT EFFECTS → to stats/emotion/domains
     # ---------------------------------------------------------
+    def effect_plans(self):
+        """
+        {habit_id: HabitPlan} (modules.habit_effects), cached on the habits
+        store. Recompiled only when definitions change (the cache is dropped
+        on reload and by save_json) or the tables they target gain or lose
+        keys.
+        """
+        signature = target_signature(self.system)
+        cached = self.habits_store.cache.get("effect_plans")
+        if cached is None or cached[0] != signature:
+            cached = (signature, compile_plans(self.get_definitions(), self.system))
+            self.habits_store.cache["effect_plans"] = cached
+        return cached[1]
+
     def apply_habit_effect(self, habit_id):
         """
         Efectos de hábitos hacia:
@@ -74,119 +178,150 @@ class HabitsManager:
         - emotion (fatigue, clarity…)
         - domains (academia, consulting…)
         """
-
-        definitions = self.get_definitions()
-        habit = next((h for h in definitions if h["id"] == habit_id), None)
-        if not habit:
+        plan = self.effect_plans().get(habit_id)
+        if plan is None:
             return
 
-        effects = habit.get("effects", {})
-
-        # Stats directos
-        stats = self.system.get("stats", {})
-        emotion = self.system.get("emotion", {})
-        domains = self.system.get("domains", {})
-
-        for key, value in effects.items():
-
-            # ---------- Stats ----------
-            if key in stats:
-                stats[key] += value
-            
-            # ---------- Emotion ----------
-            elif key in emotion:
-                emotion[key] += value
-            
-            # ---------- Domains ----------
-            elif key == "domains":
-                for d_key, d_value in value.items():
-                    if d_key in domains:
-                        domains[d_key]["exp"] += d_value
-
-                        # Level-up de domains
-                        if domains[d_key]["exp"] >= domains[d_key]["exp_to_next"]:
-                            domains[d_key]["exp"] = 0
-                            domains[d_key]["level"] += 1
-                            domains[d_key]["exp_to_next"] = int(domains[d_key]["exp_to_next"] * 1.35)
-
-        # Save system
-        self.system["stats"] = stats
-        self.system["emotion"] = emotion
-        self.system["domains"] = domains
-        self.save_json(self.system_path, self.system)
+        apply_plan(plan, self.system)
+        self.store.save()
+
+    def import_history(self, daily_log):
+        """
+        Bulk-import {date: {habit_id: True}} (the get_daily_log() layout),
+        e.g. a year of history. Days already marked are skipped; the rest
+        are set in the log, their effects applied in one pass, and streaks
+        and rollups rebuilt once. Returns {habit_id: days imported}.
+
+        Same rewards as toggling the days one by one: stats, emotion and
+        domain EXP for every day, plus the streak Dark Points for every
+        full week of streak the import completes.
+        """
+        with self.transaction():
+            log = self.habit_log()
+            # streak baselines before the import: weeks already logged stay paid
+            self.streak_engine()
+            for habit_id in {h for habits in daily_log.values() for h, done in habits.items() if done}:
+                self.streak_summary(habit_id)
+
+            completions = []
+            for day in sorted(daily_log):
+                for habit_id, done in daily_log[day].items():
+                    if done and not log.get(habit_id, day):
+                        log.set(habit_id, day, True)
+                        completions.append(habit_id)
+
+            apply_plans(self.effect_plans(), completions, self.system)
+            self.store.save()
+
+            self.section()["log"] = log.to_json()
+            self.recompute_streaks(pay=True)
+            self.recompute_rollups()
+            self.habits_store.save()
+
+        imported = {}
+        for habit_id in completions:
+            imported[habit_id] = imported.get(habit_id, 0) + 1
+        return imported
 
     # ---------------------------------------------------------
     # STREAK SYSTEM
     # ---------------------------------------------------------
-    def update_streak(self, habit_id):
+    def update_streak(self, habit_id, date_str, done):
         """
-        Actualiza el streak del hábito, revisando si se completó
-        el día anterior.
-        Cada 7 días seguidos → 25 Dark Points
+        Aplica un toggle (de cualquier fecha, también retroactivo) al
+        motor de streaks y guarda el resumen del hábito en el documento.
+        Cada 7 días seguidos → Dark Points, una sola vez por semana
+        lograda (desmarcar y volver a marcar no la paga de nuevo).
         """
-
-        today = datetime.now().strftime("%Y-%m-%d")
-        yesterday = (datetime.now() - timedelta(days=1)).strftime("%Y-%m-%d")
-
-        log = self.get_daily_log()
-        streaks = self.get_streaks()
-
-        streak = streaks.get(habit_id, 0)
-
-        # Si el hábito se completó hoy
-        if today in log and log[today].get(habit_id, False):
-
-            # Si también se completó ayer → streak +1
-            if yesterday in log and log[yesterday].get(habit_id, False):
-                streak += 1
-            else:
-                streak = 1  # nuevo streak
-
-            # Bonus de Dark Points por 7 días
-            if streak >= 7:
-                self.give_dark_points_bonus()
-                streak = 0  # reset después de recompensa
-
-        else:
-            streak = 0  # streak roto
-
-        streaks[habit_id] = streak
-        self.habits["streaks"] = streaks
-        self.save_json(self.habits_path, self.habits)
+        engine = self.streak_engine()
+        entry = self.streak_summary(habit_id)
+        engine.set(habit_id, date_str, done)
+
+        new_weeks = engine.full_weeks(habit_id) - entry["rewarded_weeks"]
+        if new_weeks > 0:
+            self.give_dark_points_bonus(new_weeks)
+            entry["rewarded_weeks"] += new_weeks
+        self.streak_summary(habit_id)
+
+    def streak_summary(self, habit_id):
+        """Persisted {"current", "longest", "rewarded_weeks"} of one habit, refreshed."""
+        engine = self.streak_engine()
+        streaks = self.section().setdefault("streaks", {})
+        entry = streaks.get(habit_id)
+        if not isinstance(entry, dict):
+            # new habit or the old reset-at-7 counter: weeks already in the
+            # log count as paid, only new ones earn Dark Points
+            entry = {"rewarded_weeks": engine.full_weeks(habit_id)}
+            streaks[habit_id] = entry
+        entry["current"] = engine.current(habit_id, self.store.now())
+        entry["longest"] = engine.longest(habit_id)
+        return entry
+
+    def recompute_streaks(self, pay=False):
+        """
+        Rebuild every streak from the bitset log in one pass (after an
+        import or a bulk edit of the log). Full weeks of streak that the
+        rebuild brings are paid in Dark Points with pay=True (imports),
+        otherwise just marked as paid.
+        """
+        with self.habits_store.transaction():
+            engine = StreakEngine.from_log(self.habit_log())
+            self.habits_store.cache["streaks"] = engine
+            for habit_id in self.habit_log().bits:
+                entry = self.streak_summary(habit_id)
+                new_weeks = engine.full_weeks(habit_id) - entry["rewarded_weeks"]
+                if new_weeks > 0:
+                    if pay:
+                        self.give_dark_points_bonus(new_weeks)
+                    entry["rewarded_weeks"] += new_weeks
+            self.habits_store.save()
+
+    def streak_history(self, habit_id):
+        """[(first day, last day, length), ...] of every streak, oldest first."""
+        return self.streak_engine().history(habit_id)
 
     # ---------------------------------------------------------
     # GIVE DARK POINTS
     # ---------------------------------------------------------
-    def give_dark_points_bonus(self):
+    def give_dark_points_bonus(self, weeks=1):
         """
-        Otorga +25 Dark Points al completar 7 días seguidos.
+        Otorga +25 Dark Points por cada 7 días seguidos.
         """
         dp = self.system.get("dark_points", 0)
-        dp += self.habits.get("streak_bonus_dark_points", 25)
+        dp += self.habits.get("streak_bonus_dark_points", 25) * weeks
         self.system["dark_points"] = dp
-        self.save_json(self.system_path, self.system)
+        self.store.save()
 
     # ---------------------------------------------------------
-    # WEEKLY SUMMARY (for charts)
+    # ANALYTICS (for charts)
     # ---------------------------------------------------------
     def get_week_summary(self, week_start_date):
         """
         Retorna datos para graficar la semana entera.
         week_start_date debe ser datetime.
         """
-        log = self.get_daily_log()
-        summary = []
+        end = week_start_date + timedelta(days=6)
+        return [e["total"] for _, e in self.habit_rollups().series(week_start_date, end)]
 
-        for i in range(7):
-            day = (week_start_date + timedelta(days=i)).strftime("%Y-%m-%d")
-            daily_count = 0
+    def get_rollups(self, start, end, period="day"):
+        """
+        [(bucket, {"total", "habits", "weekdays", "domains"}), ...] per
+        day, week or month touching [start, end].
+        """
+        return self.habit_rollups().series(start, end, period)
 
-            if day in log:
-                for h_id, done in log[day].items():
-                    if done:
-                        daily_count += 1
+    def get_totals(self, start, end):
+        """Same entry aggregated over exactly [start, end]."""
+        return self.habit_rollups().totals(start, end)
 
-            summary.append(daily_count)
+    def recompute_rollups(self):
+        """Rebuild the rollups from the log (after an import or editing habit effects)."""
+        self.habits_store.cache.pop("rollups", None)
+        return self.habit_rollups()
 
-        return summary
+    def longest_streak(self, habit_id):
+        return self.streak_engine().longest(habit_id)
 
+    def completion_rate(self, habit_id, start, end):
+        """Share of days in [start, end] the habit was done (0–1)."""
+        return self.habit_log().completion_rate(habit_id, start, end)
@@ -0,0 +1,222 @@
+import os
+import threading
+from pathlib import Path
+
+from modules import serializer
+from modules.state import atomic_write_text
+
+
+def trim_torn_tail(path, chunk=4096):
+    """
+    Cut a segment back to its last complete line. A crash mid-append
+    leaves a final line without "\n"; appending after it would glue the
+    next record onto it and lose that one too.
+    """
+    try:
+        f = open(path, "rb+")
+    except FileNotFoundError:
+        return
+    with f:
+        end = f.seek(0, os.SEEK_END)
+        if end == 0:
+            return
+        f.seek(end - 1)
+        if f.read(1) == b"\n":
+            return
+
+        pos = end
+        keep = 0
+        while pos > 0:
+            start = max(0, pos - chunk)
+            f.seek(start)
+            i = f.read(pos - start).rfind(b"\n")
+            if i >= 0:
+                keep = start + i + 1
+                break
+            pos = start
+        f.truncate(keep)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class HistoryLog:
+    """
+    Append-only store for an ever-growing collection (events, logs,
+    expired effects). Records live in monthly JSON-lines segments under
+    `<data dir>/history/<name>/YYYY-MM.jsonl`, so appending is O(1) and the
+    main state document only keeps current state.
+
+    Appends made inside a transaction of the log's store are held back
+    and written only once the document save succeeds, so a rolled-back
+    action never leaves history behind.
+    """
+
+    _logs = {}
+    _registry_lock = threading.Lock()
+
+    # which field of a record decides its monthly segment
+    DATE_FIELDS = {"effects_history": "expires_at"}
+
+    def __init__(self, directory, date_field="date"):
+        self.directory = Path(directory)
+        self.date_field = date_field
+        self.lock = threading.Lock()
+        # store whose transactions defer our appends (set by for_store)
+        self.store = None
+
+    # ----------------------------------------------------------
+    # SHARED INSTANCES
+    # ----------------------------------------------------------
+    @classmethod
+    def for_store(cls, store, name):
+        """
+        Shared log `name` living next to `store`'s file. A legacy list kept
+        under `name` inside the document is moved into the log on first use.
+        """
+        if not store.shared:
+            log = store.open_history(name)
+            log.absorb(store, name)
+            return log
+
+        key = (os.path.abspath(store.path), name)
+        with cls._registry_lock:
+            log = cls._logs.get(key)
+            if log is None:
+                if hasattr(store, "open_history"):
+                    log = store.open_history(name)
+                else:
+                    directory = Path(store.path).parent / "history" / name
+                    log = cls(directory, cls.DATE_FIELDS.get(name, "date"))
+                cls._logs[key] = log
+            log.store = store
+
+        log.absorb(store, name)
+        return log
+
+    def absorb(self, store, name):
+        """Move `store.data[name]` (old single-document layout) into the log."""
+        with store.transaction():
+            data = store.load()
+            legacy = data.get(name)
+            if not isinstance(legacy, list):
+                return
+
+            # written before the document drops them: never deferred
+            self.write(legacy)
+            del data[name]
+            store.save()
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def segment_for(self, record):
+        date = str(record.get(self.date_field) or "")
+        month = date[:7] if len(date) >= 7 else "undated"
+        return self.directory / f"{month}.jsonl"
+
+    def append(self, record):
+        """Append one record (a single line write, independent of history size)."""
+        self.extend([record])
+        return record
+
+    def extend(self, records):
+        if not records:
+            return
+        if self.store is not None and self.store.defer_history(self, records):
+            return
+        self.write(records)
+
+    def write(self, records):
+        """Append `records` to their segments now."""
+        if not records:
+            return
+
+        by_segment = {}
+        for r in records:
+            by_segment.setdefault(self.segment_for(r), []).append(r)
+
+        with self.lock:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            for segment, rows in by_segment.items():
+                trim_torn_tail(segment)
+                with open(segment, "a", encoding="utf-8") as f:
+                    for r in rows:
+                        f.write(serializer.dumps(r) + "\n")
+                    f.flush()
+                    os.fsync(f.fileno())
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def month_of(self, segment):
+        return segment.stem
+
+    def segments(self):
+        if not self.directory.exists():
+            return []
+        return sorted(self.directory.glob("*.jsonl"))
+
+    def read_segment(self, segment):
+        records = []
+        with open(segment, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    records.append(serializer.loads(line))
+                except ValueError:
+                    # torn trailing line from a crash mid-append
+                    continue
+        return records
+
+    def read(self, since=None, until=None):
+        """
+        Records in chronological order. `since`/`until` are date strings
+        ("YYYY-MM-DD...") compared on the record's date field, inclusive;
+        only the monthly segments overlapping the range are opened.
+        """
+        result = []
+        for segment in self.segments():
+            month = self.month_of(segment)
+            if since and month != "undated" and month < since[:7]:
+                continue
+            if until and month != "undated" and month > until[:7]:
+                continue
+
+            for r in self.read_segment(segment):
+                date = str(r.get(self.date_field) or "")
+                if since and date[:len(since)] < since:
+                    continue
+                if until and date[:len(until)] > until:
+                    continue
+                result.append(r)
+        return result
+
+    def tail(self, n):
+        """Last `n` records, reading only as many recent segments as needed."""
+        result = []
+        for segment in reversed(self.segments()):
+            result = self.read_segment(segment) + result
+            if len(result) >= n:
+                break
+        return result[-n:] if n else []
+
+    # ----------------------------------------------------------
+    # ADMIN EDITS
+    # ----------------------------------------------------------
+    def remove(self, record):
+        """Delete one record (rewrites only the segment that holds it)."""
+        segment = self.segment_for(record)
+        if not segment.exists():
+            return False
+
+        with self.lock:
+            records = self.read_segment(segment)
+            if record not in records:
+                return False
+            records.remove(record)
+
+            text = "".join(serializer.dumps(r) + "\n" for r in records)
+            atomic_write_text(str(segment), text)
+        return True
@@ -1,12 +1,18 @@
-import json
 import os
-from datetime import datetime
+from datetime import timedelta
 from pathlib import Path
 
+from modules import serializer
+from modules.archive import ArchiveLog
+from modules.history import HistoryLog
+from modules.state import StateStore, atomic_write_json
+from modules.timestamps import parse
+
 
 class MemoryManager:
     def __init__(self, memory_path="data/system_memory.json", backup_dir="data/backups/"):
         self.memory_path = memory_path
+        self.store = StateStore.open(memory_path)
         self.backup_dir = Path(backup_dir)
         self.backup_dir.mkdir(parents=True, exist_ok=True)
 
@@ -15,23 +21,18 @@ class MemoryManager:
     # ----------------------------------------------------------
     def load_memory(self):
         """Load main memory file."""
-        try:
-            with open(self.memory_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self, data):
         """Save main memory file."""
-        with open(self.memory_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        self.store.save(data)
 
     # ----------------------------------------------------------
     # DAILY BACKUP SYSTEM
     # ----------------------------------------------------------
     def auto_backup(self):
         """Create a daily backup based on the date."""
-        today = datetime.now().strftime("%Y-%m-%d")
+        today = self.store.now().strftime("%Y-%m-%d")
         backup_path = self.backup_dir / f"{today}.json"
 
         # If backup already exists, skip
@@ -41,8 +42,7 @@ class MemoryManager:
         # Create backup
         data = self.load_memory()
 
-        with open(backup_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        atomic_write_json(backup_path, data)
 
         return f"Backup created: {backup_path}"
 
@@ -59,8 +59,7 @@ class MemoryManager:
 
         data = self.load_memory()
 
-        with open(backup_path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        atomic_write_json(backup_path, data)
 
         return f"Manual backup created: {backup_path}"
 
@@ -74,8 +73,11 @@ class MemoryManager:
         if not backup_path.exists():
             raise FileNotFoundError("Backup file doesn't exist.")
 
-        with open(backup_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = serializer.load_file(backup_path)
+
+        # events/logs already live in the history log; don't resurrect copies
+        for key in ("events", "logs"):
+            data.pop(key, None)
 
         # overwrite main memory
         self.save_memory(data)
@@ -93,8 +95,7 @@ class MemoryManager:
         if not backup_path.exists():
             return "No backup exists for this date."
 
-        with open(backup_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
+        data = serializer.load_file(backup_path)
 
         # Build narrative
         chapter = f"📜 CAPÍTULO DEL {date}\n"
@@ -121,9 +122,33 @@ class MemoryManager:
         else:
             chapter += "  - No había boss activo.\n"
 
+        chapter += "\n🎯 MISIONES COMPLETADAS:\n"
+        for m in self.missions_completed_on(date, data):
+            chapter += f"  - {m['title']} (+{m['reward_exp']} EXP)\n"
+
         chapter += "\n📜 EVENTOS DEL DÍA:\n"
-        for e in data.get("events", []):
+        # older backups still carry the events inside the document
+        events = data.get("events") or HistoryLog.for_store(self.store, "events").read(date, date)
+        for e in events:
             if e.get("date") == date:
-                chapter += f"  - {e['type'].upper()}: {e['description']}\n"
+                chapter += f"  - {e['type'].upper()}: {e.get('description', e.get('name', ''))}\n"
 
         return chapter
+
+    def missions_completed_on(self, date, data):
+        """Missions completed on `date`: the backup's own plus archived ones."""
+        missions = [m for ms in data.get("missions", {}).values() for m in ms]
+
+        # archived missions were created at most a month before completion
+        since = (parse(f"{date} 00:00") - timedelta(days=31)).strftime("%Y-%m-%d")
+        archive = ArchiveLog.for_store(self.store, "missions")
+        missions.extend(archive.iter_records(since, date))
+
+        seen = set()
+        done = []
+        for m in missions:
+            key = (m["title"], m["created_at"])
+            if str(m.get("completed_at", "")).startswith(date) and key not in seen:
+                seen.add(key)
+                done.append(m)
+        return done
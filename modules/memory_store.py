@@ -0,0 +1,83 @@
+import copy
+
+from modules.history import HistoryLog
+from modules.state import StateStore
+
+
+class MemoryStore(StateStore):
+    """
+    StateStore that never touches disk: no file, lock, journal or history
+    directory. Managers accept it in place of a memory path, so the game
+    loop can run headless (see modules.campaign).
+
+    Saves only clear the dirty flag. There is no on-disk copy to roll back
+    to, so a failed transaction keeps whatever it changed in memory.
+    """
+
+    shared = False
+
+    def __init__(self, data=None, context=None):
+        super().__init__(":memory:")
+        self.data = copy.deepcopy(data) if data is not None else {}
+        self.histories = {}
+        if context is not None:
+            self.context = context
+
+    def file_signature(self):
+        return None
+
+    def exists(self):
+        return True
+
+    def load(self):
+        return self.data
+
+    def flush(self):
+        self.dirty = False
+
+    def discard(self):
+        self.dirty = False
+
+    def recover_journal(self):
+        pass
+
+    def open_history(self, name):
+        log = self.histories.get(name)
+        if log is None:
+            log = MemoryHistoryLog(name, HistoryLog.DATE_FIELDS.get(name, "date"))
+            self.histories[name] = log
+        return log
+
+
+class MemoryHistoryLog(HistoryLog):
+    """HistoryLog kept in a plain list (one per MemoryStore)."""
+
+    def __init__(self, name, date_field="date"):
+        super().__init__(name, date_field)
+        self.records = []
+
+    def write(self, records):
+        self.records.extend(records)
+
+    def read(self, since=None, until=None):
+        result = []
+        for r in self.records:
+            date = str(r.get(self.date_field) or "")
+            if since and date[:len(since)] < since:
+                continue
+            if until and date[:len(until)] > until:
+                continue
+            result.append(r)
+        return result
+
+    def iter_records(self, since=None, until=None):
+        return iter(self.read(since, until))
+
+    def tail(self, n):
+        return self.records[-n:] if n else []
+
+    def remove(self, record):
+        if record not in self.records:
+            return False
+        self.records.remove(record)
+        return True
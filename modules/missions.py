@@ -1,26 +1,57 @@
-import json
-from datetime import datetime, timedelta
-import random
+import hashlib
+import operator
+import os
+from datetime import timedelta
+
+from modules import serializer
+from modules.archive import ArchiveLog
+from modules.deadlines import DeadlineIndex
+from modules.state import StaleStateError, StateStore, transactional
+from modules.timestamps import format_time, parse
+
+
+TEMPLATES_PATH = "data/mission_templates.json"
+
+# settled missions stay in the state document this many days before archiving
+ARCHIVE_AFTER_DAYS = 7
+
+# comparison operators allowed in a template's `when` clause
+CONDITIONS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le}
+
+_templates = {}
+
+
+def load_templates(path=TEMPLATES_PATH):
+    """Mission templates from `path`, re-read only when the file changes."""
+    st = os.stat(path)
+    signature = (st.st_mtime_ns, st.st_size)
+    cached = _templates.get(path)
+    if cached is None or cached[0] != signature:
+        cached = (signature, serializer.load_file(path))
+        _templates[path] = cached
+    return cached[1]
 
 
 class MissionManager:
-    def __init__(self, memory_path="data/system_memory.json"):
+    def __init__(self, memory_path="data/system_memory.json", templates=TEMPLATES_PATH):
         self.path = memory_path
+        # path of a templates file, or the templates dict itself
+        self.templates = templates
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
+        self.archive = ArchiveLog.for_store(self.store, "missions")
+        if "missions" in self.data:
+            # builds the id map (and ids for missions saved before them)
+            self.deadline_index()
 
     # ----------------------------------------------------------
     # BASIC MEMORY OPERATIONS
     # ----------------------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # ----------------------------------------------------------
     # INTERNAL UTILS
@@ -52,117 +83,161 @@ class MissionManager:
 
     def calculate_xp(self, difficulty):
         """XP scales with difficulty but is randomized."""
-        return random.randint(5 * difficulty, 15 * difficulty)
+        return self.store.rng.randint(5 * difficulty, 15 * difficulty)
 
     def calculate_dark_points(self, difficulty):
         """Dark Points scale with difficulty (1–3 per difficulty)."""
-        return difficulty * random.randint(1, 3)
+        return difficulty * self.store.rng.randint(1, 3)
+
+    def deadline_index(self):
+        """Deadline heap + id map over missions, cached on the shared store."""
+        missions = self.data["missions"]
+        index = self.store.cache.get("missions")
+        if index is None or not index.tracks(missions):
+            self.assign_missing_ids(missions)
+            index = DeadlineIndex(missions)
+            self.store.cache["missions"] = index
+        return index
 
     # ----------------------------------------------------------
-    # CREATE MISSION
+    # STABLE IDS
     # ----------------------------------------------------------
-    def create_mission(self, title, description, mission_type, base_difficulty, deadline_days=1):
-        now = datetime.now()
-        deadline = now + timedelta(days=deadline_days)
+    def new_mission_id(self):
+        return f"m-{self.store.rng.getrandbits(48):012x}"
+
+    def assign_missing_ids(self, missions):
+        """
+        Give missions saved before ids existed one derived from their
+        content and position, so every process assigns the same id.
+
+        The same ids go into the store's last-saved `base`, so adding them
+        is never a local edit: it doesn't conflict with missions another
+        process appended, and the ids reach disk with the next save.
+        """
+        base = getattr(self.store, "base", None) or {}
+        for doc in (missions, base.get("missions", {})):
+            for mtype, items in doc.items():
+                for i, m in enumerate(items):
+                    if "id" not in m:
+                        key = f"{mtype}|{i}|{m.get('created_at')}|{m.get('title')}"
+                        m["id"] = "m-" + hashlib.sha1(key.encode("utf-8")).hexdigest()[:12]
+
+    def get_mission(self, mission_id):
+        """The mission with `mission_id`, or None (O(1))."""
+        found = self.deadline_index().find(mission_id)
+        return found[1] if found else None
+
+    def find_mission(self, mission_id):
+        found = self.deadline_index().find(mission_id)
+        if found is None:
+            raise KeyError(f"Mission {mission_id!r} does not exist.")
+        return found
+
+    def next_deadline(self):
+        """When the next pending mission expires (datetime), or None."""
+        return self.deadline_index().next_deadline()
 
-        difficulty = self.calculate_difficulty(base_difficulty, mission_type)
-        reward_exp = self.calculate_xp(difficulty)
-        dark_points = self.calculate_dark_points(difficulty)
-
-        mission = {
+    # ----------------------------------------------------------
+    # CREATE MISSIONS
+    # ----------------------------------------------------------
+    def create_mission(self, title, description, mission_type, base_difficulty, deadline_days=1):
+        return self.create_missions([{
             "title": title,
             "description": description,
-            "difficulty": difficulty,
-            "reward_exp": reward_exp,
-            "reward_dark": dark_points,
-            "status": "pending",
-            "created_at": now.strftime("%Y-%m-%d %H:%M"),
-            "deadline": deadline.strftime("%Y-%m-%d %H:%M"),
-            "mission_type": mission_type
-        }
-
-        self.data["missions"][mission_type].append(mission)
-        self.save_memory()
-        return mission
+            "mission_type": mission_type,
+            "base_difficulty": base_difficulty,
+            "deadline_days": deadline_days
+        }])[0]
+
+    @transactional
+    def create_missions(self, specs):
+        """
+        Create many missions in one write. Each spec is a dict with title,
+        description, mission_type, base_difficulty and optionally
+        deadline_days (default 1).
+        """
+        now = self.store.now()
+        index = self.deadline_index()
+        created = []
+
+        for spec in specs:
+            mission_type = spec["mission_type"]
+            deadline = now + timedelta(days=spec.get("deadline_days", 1))
+
+            difficulty = self.calculate_difficulty(spec["base_difficulty"], mission_type)
+            reward_exp = self.calculate_xp(difficulty)
+            dark_points = self.calculate_dark_points(difficulty)
+
+            mission = {
+                "id": self.new_mission_id(),
+                "title": spec["title"],
+                "description": spec["description"],
+                "difficulty": difficulty,
+                "reward_exp": reward_exp,
+                "reward_dark": dark_points,
+                "status": "pending",
+                "created_at": format_time(now),
+                "deadline": format_time(deadline),
+                "mission_type": mission_type
+            }
+
+            self.data["missions"][mission_type].append(mission)
+            index.push(mission_type, mission)
+            created.append(mission)
+
+        if created:
+            self.save_memory()
+        return created
 
     # ----------------------------------------------------------
-    # AUTO-GENERATED MISSIONS
-    # ----------------------------------------------------------
-    def generate_daily_missions(self):
-        missions_list = []
-
-        missions_list.append(self.create_mission(
-            "Revisión Estratégica del Día",
-            "Planifica tu día usando el sistema Isekai.",
-            "daily",
-            base_difficulty=1,
-            deadline_days=1
-        ))
-
-        missions_list.append(self.create_mission(
-            "Acción Profesional",
-            "Avanzar en Mercor, CV o portafolio.",
-            "daily",
-            base_difficulty=2,
-            deadline_days=1
-        ))
-
-        missions_list.append(self.create_mission(
-            "Romper la Maldición",
-            "Haz una microacción de avance.",
-            "daily",
-            base_difficulty=1,
-            deadline_days=1
-        ))
-
-        # emotional dynamic missions
-        anxiety = self.data["emotion"]["anxiety"]
-        if anxiety > 60:
-            missions_list.append(self.create_mission(
-                "Calm Quest",
-                "5 minutos de respiración consciente.",
-                "daily",
-                base_difficulty=1
-            ))
-
-        return missions_list
-
-    def generate_weekly_missions(self):
-        missions_list = []
-
-        missions_list.append(self.create_mission(
-            "Progreso en Mercor",
-            "Aplicar a trabajos, mejorar perfil, enviar portafolio.",
-            "weekly",
-            base_difficulty=3,
-            deadline_days=7
-        ))
-
-        missions_list.append(self.create_mission(
-            "Avance Académico",
-            "Tesis, lecturas o tareas del máster.",
-            "weekly",
-            base_difficulty=2,
-            deadline_days=7
-        ))
-
-        missions_list.append(self.create_mission(
-            "Mantenimiento del Mundo Exterior",
-            "Acción de orden, finanzas o salud.",
-            "weekly",
-            base_difficulty=1,
-            deadline_days=7
-        ))
-
-        return missions_list
+    # AUTO-GENERATED MISSIONS (TEMPLATES IN data/mission_templates.json)
+    # ----------------------------------------------------------
+    def mission_templates(self):
+        if isinstance(self.templates, dict):
+            return self.templates
+        return load_templates(self.templates)
+
+    def template_applies(self, template):
+        """Templates with a `when` clause only apply in matching states."""
+        values = {**self.data.get("stats", {}), **self.data.get("emotion", {})}
+        for field, (op, threshold) in template.get("when", {}).items():
+            if not CONDITIONS[op](values.get(field, 0), threshold):
+                return False
+        return True
+
+    def specs_from_templates(self, kind, days=1):
+        """Mission specs for `days` consecutive periods of `kind` templates."""
+        templates = [t for t in self.mission_templates().get(kind, []) if self.template_applies(t)]
+        period = 7 if kind == "weekly" else 1
+
+        specs = []
+        for i in range(days):
+            for t in templates:
+                spec = {k: v for k, v in t.items() if k != "when"}
+                spec.setdefault("mission_type", kind)
+                spec["deadline_days"] = spec.get("deadline_days", period) + i * period
+                specs.append(spec)
+        return specs
+
+    def generate_daily_missions(self, days=1):
+        """Daily missions for today (and the next `days - 1` days), one write."""
+        return self.create_missions(self.specs_from_templates("daily", days))
+
+    def generate_weekly_missions(self, weeks=1):
+        return self.create_missions(self.specs_from_templates("weekly", weeks))
 
     # ----------------------------------------------------------
     # COMPLETION
     # ----------------------------------------------------------
-    def complete_mission(self, mission_type, index):
-        mission = self.data["missions"][mission_type][index]
+    @transactional
+    def complete_mission(self, mission_id):
+        """Complete a pending mission by id; settled missions are returned as is."""
+        _, mission = self.find_mission(mission_id)
+        if mission["status"] != "pending":
+            return mission
+
         mission["status"] = "completed"
-        mission["completed_at"] = datetime.now().strftime("%Y-%m-%d %H:%M")
+        mission["completed_at"] = format_time(self.store.now())
 
         # grant EXP
         from modules.stats import StatsManager
@@ -175,46 +250,91 @@ class MissionManager:
         self.save_memory()
         return mission
 
+    def complete_from_ui(self, mission_id):
+        """
+        complete_mission() for button callbacks: returns a (level, message)
+        pair for st.<level>() instead of raising when the state changed in
+        another tab or the mission was archived since the last render.
+        """
+        try:
+            self.complete_mission(mission_id)
+        except StaleStateError:
+            return ("warning", "El estado cambió en otra pestaña. Se recargó la misión; inténtalo de nuevo.")
+        except KeyError:
+            return ("warning", "Esa misión ya no existe (fue archivada o eliminada).")
+        return ("success", "¡Misión completada! Recompensas aplicadas.")
+
     # ----------------------------------------------------------
     # FAIL HANDLING
     # ----------------------------------------------------------
+    @transactional
     def fail_expired_missions(self):
-        now = datetime.now()
+        """Fail pending missions past their deadline; writes only if any expired."""
         failed = []
 
-        for mtype, missions in self.data["missions"].items():
-            for m in missions:
-                if m["status"] == "pending":
-                    deadline = datetime.strptime(m["deadline"], "%Y-%m-%d %H:%M")
-                    if now > deadline:
-                        m["status"] = "failed"
-                        failed.append(m)
+        for mtype, m in self.deadline_index().pop_expired(self.store.now()):
+            m["status"] = "failed"
+            failed.append(m)
 
-        # punishment: emotional debuff
         if failed:
-            from modules.stats import StatsManager
-            sm = StatsManager(self.path)
+            self.punish_failures()
+            self.save_memory()
+        return failed
 
-            sm.add_effect(
-                name="Frustración por Misiones Incompletas",
-                effect_type="debuff",
-                duration_hours=24,
-                modifiers={"wisdom": -1, "charisma": -1},
-                icon="debuff"
-            )
+    @transactional
+    def fail_mission(self, mission_id):
+        """Fail a pending mission by id (e.g. abandoned from the UI)."""
+        _, mission = self.find_mission(mission_id)
+        if mission["status"] != "pending":
+            return mission
 
+        mission["status"] = "failed"
+        self.punish_failures()
         self.save_memory()
-        return failed
+        return mission
+
+    def punish_failures(self):
+        """Emotional debuff for failed missions."""
+        from modules.stats import StatsManager
+        sm = StatsManager(self.path)
+
+        sm.add_effect(
+            name="Frustración por Misiones Incompletas",
+            effect_type="debuff",
+            duration_hours=24,
+            modifiers={"wisdom": -1, "charisma": -1},
+            icon="debuff"
+        )
 
     # ----------------------------------------------------------
-    # CLEANUP
+    # ARCHIVE (COLD TIER)
     # ----------------------------------------------------------
-    def cleanup_missions(self):
-        now = datetime.now()
-        for mtype in self.data["missions"]:
-            self.data["missions"][mtype] = [
-                m for m in self.data["missions"][mtype]
-                if (now - datetime.strptime(m["created_at"], "%Y-%m-%d %H:%M")).days < 30
-            ]
+    @transactional
+    def cleanup_missions(self, keep_days=ARCHIVE_AFTER_DAYS):
+        """
+        Move settled (completed/failed) missions older than `keep_days`
+        into the gzip archive; pending ones always stay. Returns how many
+        were archived. Nothing is deleted any more.
+        """
+        now = self.store.now()
+        archived = []
 
-        self.save_memory()
+        for mtype, missions in self.data["missions"].items():
+            keep = []
+            for m in missions:
+                if m["status"] != "pending" and (now - parse(m["created_at"])).days >= keep_days:
+                    archived.append(m)
+                else:
+                    keep.append(m)
+            if len(keep) != len(missions):
+                self.data["missions"][mtype] = keep
+
+        if archived:
+            # archive first: a crash in between can duplicate, never lose
+            self.archive.extend(archived)
+            self.save_memory()
+        return len(archived)
+
+    def archived_missions(self, since=None, until=None):
+        """Lazily iterate archived missions created in [since, until]."""
+        return self.archive.iter_records(since, until)
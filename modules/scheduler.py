@@ -0,0 +1,308 @@
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+
+from modules.curse import CurseManager
+from modules.dynamic_milestones import DynamicMilestones
+from modules.memory import MemoryManager
+from modules.missions import MissionManager
+from modules.state import StateStore
+from modules.stats import StatsManager
+from modules.timestamps import format_time, parse
+from modules.world import WorldManager
+
+
+# ----------------------------------------------------------
+# CRON-LIKE SCHEDULES
+# ----------------------------------------------------------
+# job -> "daily HH:MM" | "weekly <mon..sun> HH:MM" | "every <N>m|h" | "deadlines"
+SCHEDULE = {
+    "daily": "daily 06:00",          # daily missions + world event + effect compaction
+    "weekly": "weekly mon 06:00",    # weekly missions + dynamic milestones
+    "expiries": "deadlines",         # fail missions exactly when their deadline passes
+    "cleanup": "daily 03:00",        # archive settled missions (modules.archive)
+    "curse": "daily 21:00",          # try_auto_trigger
+    "backup": "daily 00:05",         # daily snapshot of the state document
+}
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+# a job that raised is retried after this long instead of on every tick
+RETRY_AFTER = timedelta(minutes=15)
+
+# upper bound on any sleep, so edits from other processes and clock jumps
+# (suspend, DST) are noticed within this many seconds
+MAX_SLEEP = 300
+
+
+class At:
+    """
+    Fixed time of day, optionally on one weekday ("daily"/"weekly").
+
+    A slot missed while the daemon was down runs once on start-up, but
+    only within half a period of it; later than that it is skipped so a
+    late catch-up never doubles up with the next regular slot.
+    """
+
+    def __init__(self, hour, minute, weekday=None):
+        self.hour = hour
+        self.minute = minute
+        self.weekday = weekday
+        self.period = timedelta(days=1 if weekday is None else 7)
+
+    def previous(self, now):
+        """Latest scheduled time <= now."""
+        t = now.replace(hour=self.hour, minute=self.minute, second=0, microsecond=0)
+        if self.weekday is None:
+            return t if t <= now else t - timedelta(days=1)
+
+        t -= timedelta(days=(now.weekday() - self.weekday) % 7)
+        return t if t <= now else t - timedelta(days=7)
+
+    def due(self, now, last):
+        slot = self.previous(now)
+        if last is not None and last >= slot:
+            return False
+        return now - slot <= self.period / 2
+
+    def next_time(self, now, last):
+        if self.due(now, last):
+            return now
+        return self.previous(now) + self.period
+
+
+class Every:
+    """Fixed interval since the last run."""
+
+    def __init__(self, interval):
+        self.interval = interval
+
+    def due(self, now, last):
+        return last is None or now - last >= self.interval
+
+    def next_time(self, now, last):
+        return now if last is None else max(now, last + self.interval)
+
+
+class AtNextDeadline:
+    """Fires when the earliest pending mission deadline passes."""
+
+    def __init__(self, missions):
+        self.missions = missions
+
+    def due(self, now, last):
+        deadline = self.missions.next_deadline()
+        return deadline is not None and deadline < now
+
+    def next_time(self, now, last):
+        deadline = self.missions.next_deadline()
+        if deadline is None:
+            return None
+        # deadlines are minute-granular; fire just after one passes
+        return max(now, deadline + timedelta(seconds=1))
+
+
+def parse_schedule(spec, missions=None):
+    parts = spec.split()
+    kind = parts[0]
+
+    if kind == "daily" and len(parts) == 2:
+        hour, minute = map(int, parts[1].split(":"))
+        return At(hour, minute)
+
+    if kind == "weekly" and len(parts) == 3 and parts[1] in WEEKDAYS:
+        hour, minute = map(int, parts[2].split(":"))
+        return At(hour, minute, WEEKDAYS.index(parts[1]))
+
+    if kind == "every" and len(parts) == 2 and parts[1][-1] in "mh":
+        amount = int(parts[1][:-1])
+        unit = "minutes" if parts[1][-1] == "m" else "hours"
+        return Every(timedelta(**{unit: amount}))
+
+    if kind == "deadlines" and len(parts) == 1:
+        return AtNextDeadline(missions)
+
+    raise ValueError(f"Invalid schedule: {spec!r}")
+
+
+# ----------------------------------------------------------
+# SCHEDULER
+# ----------------------------------------------------------
+class Scheduler:
+    """
+    Runs the game's periodic work against the shared state document, so
+    the Streamlit UI only reads and reacts to user actions.
+
+    Each job runs as one transaction on the store and records its last
+    run under `scheduler.last_run` in the document, so a restarted
+    daemon (or a manual run from the UI) never repeats a tick that
+    already happened.
+    """
+
+    def __init__(self, memory_path="data/system_memory.json", backup_dir="data/backups/",
+                 schedule=None):
+        self.store = StateStore.open(memory_path)
+        self.missions = MissionManager(memory_path)
+        self.stats = StatsManager(memory_path)
+        self.world = WorldManager(memory_path)
+        self.curse = CurseManager(memory_path)
+        self.milestones = DynamicMilestones(memory_path)
+        self.memory = MemoryManager(memory_path, backup_dir)
+
+        self.actions = {
+            "daily": self.daily,
+            "weekly": self.weekly,
+            "expiries": self.expiries,
+            "cleanup": self.cleanup,
+            "curse": self.curse_check,
+            "backup": self.memory.auto_backup,
+        }
+        # job -> time of its last failure (cleared when it succeeds)
+        self.failures = {}
+
+        specs = {**SCHEDULE, **(schedule or {})}
+        self.schedules = {
+            name: parse_schedule(spec, self.missions) for name, spec in specs.items()
+        }
+
+    # ----------------------------------------------------------
+    # JOBS
+    # ----------------------------------------------------------
+    def daily(self):
+        missions = self.missions.generate_daily_missions()
+        event = self.world.generate_random_world_event()
+        expired = self.stats.compact_effects()
+        return f"{len(missions)} misiones, evento '{event['name']}', {len(expired)} efectos vencidos"
+
+    def weekly(self):
+        missions = self.missions.generate_weekly_missions()
+        self.milestones.generate_weekly_milestones()
+        return f"{len(missions)} misiones semanales, hitos renovados"
+
+    def expiries(self):
+        failed = self.missions.fail_expired_missions()
+        return f"{len(failed)} misiones fallidas"
+
+    def cleanup(self):
+        archived = self.missions.cleanup_missions()
+        return f"{archived} misiones archivadas"
+
+    def curse_check(self):
+        if self.curse.try_auto_trigger():
+            return "maldición activada"
+        return "sin activación"
+
+    # ----------------------------------------------------------
+    # RUNNING
+    # ----------------------------------------------------------
+    def last_runs(self):
+        return self.store.load().get("scheduler", {}).get("last_run", {})
+
+    def last_run(self, name):
+        last = self.last_runs().get(name)
+        return parse(last) if last else None
+
+    def retry_time(self, name):
+        """Earliest retry of a job that failed, or None."""
+        failed = self.failures.get(name)
+        return failed + RETRY_AFTER if failed else None
+
+    def due_jobs(self, now=None):
+        now = now or self.store.now()
+        return [
+            name for name, schedule in self.schedules.items()
+            if schedule.due(now, self.last_run(name))
+            and not (self.retry_time(name) and now < self.retry_time(name))
+        ]
+
+    def run_job(self, name):
+        """Run one job now, as a single write, and record it as run."""
+        with self.store.transaction():
+            data = self.store.load()
+            result = self.actions[name]()
+
+            runs = data.setdefault("scheduler", {}).setdefault("last_run", {})
+            runs[name] = format_time(self.store.now())
+            self.store.save()
+        return result
+
+    def run_pending(self):
+        """Run every due job once; a failing job is reported and retried after RETRY_AFTER."""
+        results = {}
+        for name in self.due_jobs():
+            try:
+                results[name] = self.run_job(name)
+                self.failures.pop(name, None)
+            except Exception as e:
+                results[name] = e
+                self.failures[name] = self.store.now()
+            log(name, results[name])
+        return results
+
+    def next_wakeup(self, now=None):
+        now = now or self.store.now()
+        times = []
+        for name, schedule in self.schedules.items():
+            t = schedule.next_time(now, self.last_run(name))
+            retry = self.retry_time(name)
+            if t is not None and retry is not None:
+                t = max(t, retry)
+            if t is not None:
+                times.append(t)
+        return min(times) if times else None
+
+    async def serve(self, max_sleep=MAX_SLEEP):
+        """Run jobs forever, sleeping until the next one is due."""
+        while True:
+            self.run_pending()
+
+            now = self.store.now()
+            wakeup = self.next_wakeup(now)
+            delay = max_sleep if wakeup is None else (wakeup - now).total_seconds()
+            await asyncio.sleep(max(1, min(delay, max_sleep)))
+
+
+def log(name, result):
+    stamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    status = "ERROR" if isinstance(result, Exception) else "ok"
+    print(f"[{stamp}] {name:9} {status}: {result}", flush=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Game tick scheduler for the Isekai system.")
+    parser.add_argument("command", choices=["run", "once", "status", "job"],
+                        help="run: daemon | once: run due jobs and exit (for cron) | "
+                             "status: show schedule | job: force one job")
+    parser.add_argument("name", nargs="?", help="job name for the `job` command")
+    parser.add_argument("--memory", default="data/system_memory.json")
+    parser.add_argument("--backups", default="data/backups/")
+    parser.add_argument("--set", action="append", default=[], metavar="JOB=SPEC",
+                        help='override a schedule, e.g. --set curse="every 6h"')
+    args = parser.parse_args()
+
+    overrides = dict(s.split("=", 1) for s in args.set)
+    scheduler = Scheduler(args.memory, args.backups, overrides)
+
+    if args.command == "run":
+        print(f"Scheduler running on {args.memory} (Ctrl+C to stop)", flush=True)
+        try:
+            asyncio.run(scheduler.serve())
+        except KeyboardInterrupt:
+            pass
+
+    elif args.command == "once":
+        scheduler.run_pending()
+
+    elif args.command == "job":
+        if args.name not in scheduler.actions:
+            parser.error(f"unknown job {args.name!r}; choose from {', '.join(scheduler.actions)}")
+        log(args.name, scheduler.run_job(args.name))
+
+    else:
+        now = scheduler.store.now()
+        specs = {**SCHEDULE, **overrides}
+        for name, schedule in scheduler.schedules.items():
+            last = scheduler.last_run(name)
+            nxt = schedule.next_time(now, last)
+            print(f"{name:9} {specs[name]:18} last {format_time(last) if last else '-':16}  "
+                  f"next {format_time(nxt) if nxt else '-'}")
@@ -0,0 +1,119 @@
+import argparse
+import json
+import time
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+
+# ----------------------------------------------------------
+# BACKEND SELECTION
+# ----------------------------------------------------------
+# orjson > ujson > stdlib, whichever is installed. All of them emit UTF-8
+# text without \u escapes (the old ensure_ascii=False behaviour).
+if orjson is not None:
+    BACKEND = "orjson"
+elif ujson is not None:
+    BACKEND = "ujson"
+else:
+    BACKEND = "json"
+
+
+def dumps(data, pretty=False, backend=None):
+    """Serialize to str. Compact by default; `pretty` indents for humans."""
+    backend = backend or BACKEND
+
+    if backend == "orjson":
+        option = orjson.OPT_INDENT_2 if pretty else 0
+        return orjson.dumps(data, option=option).decode("utf-8")
+
+    if backend == "ujson":
+        return ujson.dumps(data, ensure_ascii=False, indent=4 if pretty else 0)
+
+    if pretty:
+        return json.dumps(data, indent=4, ensure_ascii=False)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads(text, backend=None):
+    backend = backend or BACKEND
+
+    if backend == "orjson":
+        return orjson.loads(text)
+    if backend == "ujson":
+        return ujson.loads(text)
+    return json.loads(text)
+
+
+def load_file(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return loads(f.read())
+
+
+# ----------------------------------------------------------
+# CLI: PRETTY EXPORT & BENCHMARK
+# ----------------------------------------------------------
+def export_pretty(path, out_path=None):
+    """Write an indented copy of a (compact) JSON document for reading."""
+    from modules.state import atomic_write_text
+
+    out_path = out_path or path.replace(".json", ".pretty.json")
+    atomic_write_text(out_path, dumps(load_file(path), pretty=True))
+    return out_path
+
+
+def benchmark(path, rounds=50):
+    """Time load/save of `path` for every installed backend."""
+    data = load_file(path)
+    backends = ["json"] + [b for b, mod in (("ujson", ujson), ("orjson", orjson)) if mod]
+
+    results = []
+    for backend in backends:
+        for pretty in (True, False):
+            start = time.perf_counter()
+            for _ in range(rounds):
+                text = dumps(data, pretty=pretty, backend=backend)
+            dump_ms = (time.perf_counter() - start) * 1000 / rounds
+
+            start = time.perf_counter()
+            for _ in range(rounds):
+                loads(text, backend=backend)
+            load_ms = (time.perf_counter() - start) * 1000 / rounds
+
+            results.append({
+                "backend": backend,
+                "format": "pretty" if pretty else "compact",
+                "save_ms": round(dump_ms, 3),
+                "load_ms": round(load_ms, 3),
+                "bytes": len(text.encode("utf-8"))
+            })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="JSON serializer tools for the Isekai system.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p = sub.add_parser("pretty", help="export an indented copy of a state file")
+    p.add_argument("path", nargs="?", default="data/system_memory.json")
+    p.add_argument("-o", "--out", default=None)
+
+    b = sub.add_parser("bench", help="measure load/save time per backend")
+    b.add_argument("path", nargs="?", default="data/system_memory.json")
+    b.add_argument("--rounds", type=int, default=50)
+
+    args = parser.parse_args()
+
+    if args.command == "pretty":
+        print(f"Pretty copy written: {export_pretty(args.path, args.out)}")
+    else:
+        print(f"{'backend':8} {'format':8} {'save ms':>9} {'load ms':>9} {'bytes':>9}")
+        for r in benchmark(args.path, args.rounds):
+            print(f"{r['backend']:8} {r['format']:8} {r['save_ms']:9.3f} {r['load_ms']:9.3f} {r['bytes']:9}")
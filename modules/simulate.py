@@ -0,0 +1,60 @@
+import numpy as np
+
+from modules.curse import (
+    AUTO_TRIGGER_MAX_CHANCE, AUTO_TRIGGER_MIN_CHANCE, AUTO_TRIGGER_RISK
+)
+from modules.stats import CURSE_ENGINE_RISK, EMOTION_RULES, EMOTIONS
+from modules.statvec import ATTRIBUTES
+
+
+# ----------------------------------------------------------
+# VECTORIZED WHAT-IF
+# ----------------------------------------------------------
+def simulate(stress=0, anxiety=0, motivation=0, clarity=0, fatigue=0):
+    """
+    Evaluate the emotional rule tables over arrays of emotional states in
+    one NumPy pass. Inputs broadcast against each other (scalars, 1-D
+    sweeps or meshgrids) and every output has the broadcast shape:
+
+    - "modifiers": {attribute: int array} as StatsManager.emotional_modifiers
+    - "curse_engine": activation probability (0–1) of StatsManager.curse_engine
+    - "auto_trigger": probability (0–1) of CurseManager.try_auto_trigger
+
+    Probabilities assume the curse is off cooldown.
+    """
+    arrays = np.broadcast_arrays(
+        *(np.asarray(v, dtype=float) for v in (stress, anxiety, motivation, clarity, fatigue))
+    )
+    e = dict(zip(EMOTIONS, arrays))
+    shape = arrays[0].shape
+
+    modifiers = {stat: np.zeros(shape, dtype=int) for stat in ATTRIBUTES}
+    for stat, delta, condition in EMOTION_RULES:
+        modifiers[stat] += delta * condition(e)
+
+    engine = np.zeros(shape)
+    for points, condition in CURSE_ENGINE_RISK:
+        engine += points * condition(e)
+
+    risk = np.zeros(shape)
+    for points, condition in AUTO_TRIGGER_RISK:
+        risk += points * condition(e)
+    auto = np.clip(risk, AUTO_TRIGGER_MIN_CHANCE, AUTO_TRIGGER_MAX_CHANCE)
+
+    return {
+        "modifiers": modifiers,
+        # roll = randint(1, 100) <= probability
+        "curse_engine": np.clip(engine, 0, 100) / 100,
+        "auto_trigger": auto / 100,
+    }
+
+
+def risk_grid(resolution=101, **fixed):
+    """
+    Curse risk over the stress × anxiety plane (0–100 each), with the
+    other emotions held at `fixed` values. Returns (axis, result) where
+    result arrays are indexed [anxiety, stress].
+    """
+    axis = np.linspace(0, 100, resolution)
+    stress, anxiety = np.meshgrid(axis, axis)
+    return axis, simulate(stress=stress, anxiety=anxiety, **fixed)
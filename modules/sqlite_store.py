@@ -0,0 +1,413 @@
+import argparse
+import copy
+import os
+import sqlite3
+import threading
+from pathlib import Path
+
+from modules.history import HistoryLog
+from modules.serializer import dumps, load_file, loads
+from modules.state import StateStore, StaleStateError
+
+
+# ----------------------------------------------------------
+# CONFIG
+# ----------------------------------------------------------
+# Select this engine with ISEKAI_STORAGE=sqlite. Every JSON document
+# (system_memory, habits, ...) becomes a `doc` inside one database.
+DEFAULT_DB_PATH = "data/isekai.db"
+
+
+def default_db_path():
+    return os.environ.get("ISEKAI_DB_PATH", DEFAULT_DB_PATH)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    doc TEXT PRIMARY KEY,
+    revision INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS sections (
+    doc TEXT NOT NULL,
+    key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (doc, key)
+);
+
+CREATE TABLE IF NOT EXISTS missions (
+    doc TEXT NOT NULL,
+    mission_type TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    status TEXT,
+    deadline TEXT,
+    created_at TEXT,
+    body TEXT NOT NULL,
+    PRIMARY KEY (doc, mission_type, position)
+);
+CREATE INDEX IF NOT EXISTS missions_by_deadline ON missions (doc, status, deadline);
+
+CREATE TABLE IF NOT EXISTS effects (
+    doc TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    expires_at TEXT,
+    body TEXT NOT NULL,
+    PRIMARY KEY (doc, position)
+);
+CREATE INDEX IF NOT EXISTS effects_by_expiry ON effects (doc, expires_at);
+
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    doc TEXT NOT NULL,
+    name TEXT NOT NULL,
+    date TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_by_date ON history (doc, name, date);
+"""
+
+
+class Database:
+    """One shared WAL-mode connection per database file."""
+
+    _dbs = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, path):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    @classmethod
+    def open(cls, path):
+        key = os.path.abspath(path)
+        with cls._registry_lock:
+            db = cls._dbs.get(key)
+            if db is None:
+                db = cls(path)
+                cls._dbs[key] = db
+        return db
+
+    def execute(self, sql, params=()):
+        return self.conn.execute(sql, params)
+
+
+# ----------------------------------------------------------
+# STATE DOCUMENT
+# ----------------------------------------------------------
+class SqliteStateStore(StateStore):
+    """
+    StateStore kept in SQLite instead of a JSON file. Top-level sections
+    are rows of `sections`; missions and effects get their own indexed
+    tables. A flush only rewrites the rows that changed since the last
+    load, inside one BEGIN IMMEDIATE transaction that also performs the
+    revision check (concurrent readers are served by WAL).
+    """
+
+    # sections whose list items are stored as rows of their own table
+    ROW_SECTIONS = ("missions", "effects")
+
+    def __init__(self, path, journal=False, db_path=None):
+        super().__init__(path, journal=journal)
+        self.doc = Path(path).stem
+        self.db = Database.open(db_path or default_db_path())
+
+    # ----------------------------------------------------------
+    # READ
+    # ----------------------------------------------------------
+    def revision(self):
+        row = self.db.execute(
+            "SELECT revision FROM meta WHERE doc = ?", (self.doc,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def file_signature(self):
+        return self.revision()
+
+    def read_document(self):
+        doc = {}
+        rows = self.db.execute(
+            "SELECT key, value FROM sections WHERE doc = ? ORDER BY position", (self.doc,)
+        )
+        for key, value in rows:
+            doc[key] = loads(value)
+
+        if isinstance(doc.get("missions"), dict):
+            rows = self.db.execute(
+                "SELECT mission_type, body FROM missions WHERE doc = ? "
+                "ORDER BY mission_type, position", (self.doc,)
+            )
+            for mtype, body in rows:
+                doc["missions"].setdefault(mtype, []).append(loads(body))
+
+        if "effects" in doc:
+            rows = self.db.execute(
+                "SELECT body FROM effects WHERE doc = ? ORDER BY position", (self.doc,)
+            )
+            doc["effects"] = [loads(body) for (body,) in rows]
+
+        doc["revision"] = self.revision() or 0
+        return doc
+
+    def load(self):
+        with self.lock:
+            if self.dirty:
+                return self.data
+
+            with self.db.lock:
+                revision = self.revision()
+                if revision is None or revision == self.signature:
+                    return self.data
+                fresh = self.read_document()
+
+            self.replace_data(fresh)
+            self.base = copy.deepcopy(fresh)
+            self.signature = revision
+            return self.data
+
+    # ----------------------------------------------------------
+    # WRITE
+    # ----------------------------------------------------------
+    def flush_document(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            if not self.dirty:
+                return
+
+            with self.db.lock:
+                self.db.execute("BEGIN IMMEDIATE")
+                try:
+                    revision = self.revision() or 0
+                    if revision != self.base.get("revision", 0):
+                        self.rebase(self.read_document())
+
+                    self.data["revision"] = revision + 1
+                    self.write_changes(self.base, self.data)
+                    self.db.execute(
+                        "INSERT OR REPLACE INTO meta (doc, revision) VALUES (?, ?)",
+                        (self.doc, revision + 1)
+                    )
+                    self.db.execute("COMMIT")
+                except StaleStateError:
+                    self.db.execute("ROLLBACK")
+                    self.signature = self.data.get("revision")
+                    raise
+                except BaseException:
+                    self.db.execute("ROLLBACK")
+                    raise
+
+            self.base = copy.deepcopy(self.data)
+            self.signature = self.data["revision"]
+            self.dirty = False
+
+    def write_changes(self, old, new):
+        """Upsert the sections/rows of `new` that differ from `old`."""
+        old_keys = [k for k in old if k != "revision"]
+        keys = [k for k in new if k != "revision"]
+
+        for position, key in enumerate(keys):
+            value = new[key]
+            stored = value
+
+            if key == "missions" and isinstance(value, dict):
+                self.write_missions(old.get(key), value)
+                stored = {t: ([] if isinstance(v, list) else v) for t, v in value.items()}
+            elif key == "effects" and isinstance(value, list):
+                self.write_effects(old.get(key), value)
+                stored = []
+
+            moved = key not in old or old_keys.index(key) != position
+            if moved or old.get(key) != value:
+                self.db.execute(
+                    "INSERT OR REPLACE INTO sections (doc, key, position, value) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.doc, key, position, dumps(stored))
+                )
+
+        for key in set(old_keys) - set(keys):
+            self.db.execute("DELETE FROM sections WHERE doc = ? AND key = ?", (self.doc, key))
+            if key in self.ROW_SECTIONS:
+                self.db.execute(f"DELETE FROM {key} WHERE doc = ?", (self.doc,))
+
+    def write_missions(self, old, new):
+        old = old if isinstance(old, dict) else {}
+
+        for mtype, items in new.items():
+            if not isinstance(items, list):
+                continue
+            previous = old.get(mtype) if isinstance(old.get(mtype), list) else []
+
+            for i, m in enumerate(items):
+                if i < len(previous) and previous[i] == m:
+                    continue
+                self.db.execute(
+                    "INSERT OR REPLACE INTO missions "
+                    "(doc, mission_type, position, status, deadline, created_at, body) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (self.doc, mtype, i, m.get("status"), m.get("deadline"),
+                     m.get("created_at"), dumps(m))
+                )
+
+            self.db.execute(
+                "DELETE FROM missions WHERE doc = ? AND mission_type = ? AND position >= ?",
+                (self.doc, mtype, len(items))
+            )
+
+        for mtype in old:
+            if not isinstance(new.get(mtype), list):
+                self.db.execute(
+                    "DELETE FROM missions WHERE doc = ? AND mission_type = ?", (self.doc, mtype)
+                )
+
+    def write_effects(self, old, new):
+        previous = old if isinstance(old, list) else []
+
+        for i, e in enumerate(new):
+            if i < len(previous) and previous[i] == e:
+                continue
+            self.db.execute(
+                "INSERT OR REPLACE INTO effects (doc, position, expires_at, body) "
+                "VALUES (?, ?, ?, ?)",
+                (self.doc, i, e.get("expires_at"), dumps(e))
+            )
+
+        self.db.execute(
+            "DELETE FROM effects WHERE doc = ? AND position >= ?", (self.doc, len(new))
+        )
+
+    # ----------------------------------------------------------
+    # HISTORY
+    # ----------------------------------------------------------
+    def open_history(self, name):
+        return SqliteHistoryLog(self.db, self.doc, name, HistoryLog.DATE_FIELDS.get(name, "date"))
+
+
+class SqliteHistoryLog(HistoryLog):
+    """HistoryLog backed by the `history` table, with date-indexed reads."""
+
+    def __init__(self, db, doc, name, date_field="date"):
+        super().__init__(Path(db.path).parent / "history" / name, date_field)
+        self.db = db
+        self.doc = doc
+        self.name = name
+
+    def write(self, records):
+        if not records:
+            return
+
+        rows = [
+            (self.doc, self.name, r.get(self.date_field), dumps(r)) for r in records
+        ]
+        with self.db.lock:
+            self.db.execute("BEGIN IMMEDIATE")
+            try:
+                self.db.conn.executemany(
+                    "INSERT INTO history (doc, name, date, body) VALUES (?, ?, ?, ?)", rows
+                )
+                self.db.execute("COMMIT")
+            except BaseException:
+                self.db.execute("ROLLBACK")
+                raise
+
+    def read(self, since=None, until=None):
+        sql = "SELECT body FROM history WHERE doc = ? AND name = ?"
+        params = [self.doc, self.name]
+        if since:
+            sql += " AND date >= ?"
+            params.append(since)
+        if until:
+            # "~" sorts after every digit/space/colon, so prefixes match
+            sql += " AND date <= ?"
+            params.append(until + "~")
+        sql += " ORDER BY seq"
+
+        with self.db.lock:
+            rows = self.db.execute(sql, params).fetchall()
+        return [loads(body) for (body,) in rows]
+
+    def tail(self, n):
+        if not n:
+            return []
+        with self.db.lock:
+            rows = self.db.execute(
+                "SELECT body FROM history WHERE doc = ? AND name = ? ORDER BY seq DESC LIMIT ?",
+                (self.doc, self.name, n)
+            ).fetchall()
+        return [loads(body) for (body,) in reversed(rows)]
+
+    def remove(self, record):
+        with self.db.lock:
+            rows = self.db.execute(
+                "SELECT seq, body FROM history WHERE doc = ? AND name = ? AND date IS ?",
+                (self.doc, self.name, record.get(self.date_field))
+            ).fetchall()
+            for seq, body in rows:
+                if loads(body) == record:
+                    self.db.execute("DELETE FROM history WHERE seq = ?", (seq,))
+                    return True
+        return False
+
+
+# ----------------------------------------------------------
+# ONE-SHOT MIGRATION FROM JSON
+# ----------------------------------------------------------
+def migrate(json_path="data/system_memory.json", db_path=None, source=None,
+            force=False, with_history=True):
+    """
+    Import a JSON state document (the live file, or `source`, e.g. a file
+    from data/backups/) plus its JSON-lines history into SQLite.
+    """
+    store = SqliteStateStore(json_path, db_path=db_path)
+
+    if store.revision() is not None and not force:
+        raise Exception(f"'{store.doc}' already exists in {store.db.path} (use --force).")
+
+    data = load_file(source or json_path)
+
+    with store.db.lock:
+        for table in ("meta", "sections", "missions", "effects", "history"):
+            store.db.execute(f"DELETE FROM {table} WHERE doc = ?", (store.doc,))
+
+    data.pop("revision", None)
+    store.save(data)
+    store.flush()
+
+    if with_history:
+        # history already split out of the JSON document lives in segments
+        for name in ("events", "logs", "effects_history"):
+            segments = HistoryLog(Path(json_path).parent / "history" / name,
+                                  HistoryLog.DATE_FIELDS.get(name, "date"))
+            store.open_history(name).extend(segments.read())
+
+        # legacy in-document lists move into the history table
+        for name in ("events", "logs"):
+            store.open_history(name).absorb(store, name)
+
+    return f"Migrated {source or json_path} -> {store.db.path} (doc '{store.doc}')"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite storage tools for the Isekai system.")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    m = sub.add_parser("migrate", help="import JSON state into SQLite")
+    m.add_argument("--json", default="data/system_memory.json", help="live JSON document")
+    m.add_argument("--source", default=None, help="import from this file instead (e.g. a backup)")
+    m.add_argument("--db", default=None, help=f"database path (default {DEFAULT_DB_PATH})")
+    m.add_argument("--habits", default="data/habits.json", help="habits document to import too")
+    m.add_argument("--force", action="store_true", help="overwrite an existing import")
+
+    args = parser.parse_args()
+
+    if args.command == "migrate":
+        print(migrate(args.json, args.db, args.source, args.force))
+        if args.habits and os.path.exists(args.habits):
+            print(migrate(args.habits, args.db, force=args.force, with_history=False))
@@ -0,0 +1,504 @@
+import atexit
+import copy
+import functools
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+from modules import serializer
+from modules.context import GameContext
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# ----------------------------------------------------------
+# CRASH-SAFE FILE WRITES
+# ----------------------------------------------------------
+# process umask, read once: mkstemp files are 0600 whatever it says
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def file_mode(path):
+    """Permissions a rewrite of `path` should keep (umask default for new files)."""
+    try:
+        return os.stat(path).st_mode & 0o7777
+    except FileNotFoundError:
+        return 0o666 & ~_UMASK
+
+
+def fsync_dir(directory):
+    """Persist a rename in `directory` (no-op where dirs can't be opened)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write_bytes(path, data):
+    """
+    Write `data` to `path` without ever exposing a partial file:
+    temp file in the same directory -> fsync -> os.replace.
+    """
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(
+        dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+    fsync_dir(directory)
+
+
+def atomic_write_text(path, text):
+    atomic_write_bytes(path, text.encode("utf-8"))
+
+
+def atomic_write_json(path, data):
+    atomic_write_text(path, serializer.dumps(data))
+
+
+# ----------------------------------------------------------
+# CROSS-PROCESS LOCKING & MERGING
+# ----------------------------------------------------------
+class StaleStateError(Exception):
+    """Raised when a save conflicts with a newer revision on disk."""
+
+    def __init__(self, conflicts):
+        self.conflicts = conflicts
+        paths = ", ".join("/".join(map(str, c)) or "<root>" for c in conflicts)
+        super().__init__(f"State changed on disk; conflicting keys: {paths}")
+
+
+class FileLock:
+    """Advisory inter-process lock held on a sidecar `<path>.lock` file."""
+
+    def __init__(self, path):
+        self.path = path
+        self.fd = None
+
+    def __enter__(self):
+        self.fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        if fcntl is not None:
+            fcntl.flock(self.fd, fcntl.LOCK_EX)
+        else:
+            msvcrt.locking(self.fd, msvcrt.LK_LOCK, 1)
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self.fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(self.fd, 0, os.SEEK_SET)
+                msvcrt.locking(self.fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(self.fd)
+            self.fd = None
+
+
+def remove_journal(path):
+    """Delete a journal that may already have been replayed and removed."""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+_MISSING = object()
+
+
+def merge_documents(base, ours, theirs, path=()):
+    """
+    Three-way merge of JSON values. Dicts merge key by key, lists that both
+    sides only appended to keep both tails; anything else edited on both
+    sides differently is a conflict.
+    """
+    if ours == base:
+        return theirs
+    if theirs == base or theirs == ours:
+        return ours
+
+    if all(isinstance(v, dict) for v in (base, ours, theirs)):
+        merged = {}
+        conflicts = []
+        for key in list(theirs) + [k for k in ours if k not in theirs]:
+            try:
+                value = merge_documents(
+                    base.get(key, _MISSING), ours.get(key, _MISSING),
+                    theirs.get(key, _MISSING), path + (key,)
+                )
+            except StaleStateError as e:
+                conflicts.extend(e.conflicts)
+                continue
+            if value is not _MISSING:
+                merged[key] = value
+        if conflicts:
+            raise StaleStateError(conflicts)
+        return merged
+
+    if all(isinstance(v, list) for v in (base, ours, theirs)):
+        n = len(base)
+        if ours[:n] == base and theirs[:n] == base:
+            return theirs + ours[n:]
+
+    raise StaleStateError([path])
+
+
+class StateStore:
+    """
+    Process-wide, single-load cache of a JSON state file.
+
+    Every manager pointed at the same path shares one in-memory document.
+    The file is only re-parsed when its mtime/size changes on disk, and a
+    reload refreshes the shared dict in place so existing holders see it.
+
+    Writes are coalesced: inside `transaction()` every `save()` only marks
+    the document dirty and the whole unit of work flushes once at the end.
+    `write_behind(delay)` additionally debounces saves made outside of a
+    transaction onto a background timer.
+
+    Flushes are atomic (temp file + fsync + rename), so readers never see
+    a truncated document. With `journal=True` the pending document is also
+    written to `<path>.journal` first and replayed on the next load if the
+    process died before the rename.
+
+    Every flush bumps a `revision` counter in the document and runs under
+    an advisory `<path>.lock`. If another process wrote a newer revision
+    since we loaded, our edits are three-way merged onto it; edits to the
+    same values are rejected with StaleStateError and the fresh disk state
+    is loaded instead.
+    """
+
+    _stores = {}
+    _registry_lock = threading.Lock()
+
+    # history logs opened on this store are shared process-wide
+    shared = True
+
+    def __init__(self, path, journal=False):
+        self.path = path
+        self.journal = journal
+        self.journal_path = f"{path}.journal"
+        self.lock_path = f"{path}.lock"
+        self.base = {}
+        self.data = {}
+        self.signature = None
+        self.lock = threading.RLock()
+        self.depth = 0
+        self.dirty = False
+        self.flush_delay = None
+        self.timer = None
+        # derived in-memory indexes over `data`, dropped whenever it's replaced
+        self.cache = {}
+        # [(HistoryLog, records)] appended inside the open transaction
+        self.pending_history = []
+        # RNG and clock shared by every manager on this store
+        self.context = GameContext()
+
+    # ----------------------------------------------------------
+    # SHARED INSTANCES
+    # ----------------------------------------------------------
+    @classmethod
+    def open(cls, path="data/system_memory.json", journal=False):
+        """
+        Return the shared store for `path`, creating it on first use.
+        With ISEKAI_STORAGE=sqlite the document lives in the SQLite
+        database instead (see modules.sqlite_store).
+        A store passed in place of a path is returned as is.
+        """
+        if isinstance(path, StateStore):
+            return path
+
+        key = os.path.abspath(path)
+        with cls._registry_lock:
+            store = cls._stores.get(key)
+            if store is None:
+                factory = cls
+                if os.environ.get("ISEKAI_STORAGE", "json") == "sqlite":
+                    from modules.sqlite_store import SqliteStateStore
+                    factory = SqliteStateStore
+                store = factory(path, journal=journal)
+                cls._stores[key] = store
+            elif journal:
+                store.journal = True
+        return store
+
+    # ----------------------------------------------------------
+    # LOAD & SAVE
+    # ----------------------------------------------------------
+    def file_signature(self):
+        """(mtime, size) of the backing file, or None if it doesn't exist."""
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def exists(self):
+        return self.file_signature() is not None
+
+    def now(self):
+        return self.context.now()
+
+    @property
+    def rng(self):
+        return self.context.rng
+
+    def load(self):
+        """Return the shared document, re-parsing only if the file changed."""
+        with self.lock:
+            if self.dirty:
+                return self.data
+
+            if os.path.exists(self.journal_path):
+                # a writer may be mid-commit: only replay under its lock
+                with FileLock(self.lock_path):
+                    self.recover_journal()
+            signature = self.file_signature()
+
+            if signature is None or signature == self.signature:
+                return self.data
+
+            with open(self.path, "r", encoding="utf-8") as f:
+                text = f.read()
+
+            self.replace_data(serializer.loads(text))
+            self.base = serializer.loads(text)
+            self.signature = signature
+            return self.data
+
+    def replace_data(self, fresh):
+        self.data.clear()
+        self.data.update(fresh)
+        self.cache.clear()
+
+    def save(self, data=None):
+        """
+        Persist the shared document (optionally replacing its contents).
+        Deferred while a transaction is open or write-behind is enabled.
+        """
+        with self.lock:
+            if data is not None and data is not self.data:
+                self.replace_data(data)
+
+            self.dirty = True
+
+            if self.depth > 0:
+                return
+
+            if self.flush_delay is not None:
+                self.schedule_flush()
+                return
+
+            self.flush()
+
+    def flush(self):
+        """
+        Write the document if it has unsaved changes, then the history
+        appended alongside it. If the document write fails, that history
+        is dropped with it.
+        """
+        with self.lock:
+            try:
+                self.flush_document()
+            except BaseException:
+                self.pending_history = []
+                raise
+            self.write_history()
+
+    def defer_history(self, log, records):
+        """Hold a history append until the open transaction commits (False if none is open)."""
+        with self.lock:
+            if self.depth == 0:
+                return False
+            self.pending_history.append((log, list(records)))
+            return True
+
+    def write_history(self):
+        pending, self.pending_history = self.pending_history, []
+        for log, records in pending:
+            log.write(records)
+
+    def flush_document(self):
+        """Write the document to disk if it has unsaved changes."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+
+            if not self.dirty:
+                return
+
+            with FileLock(self.lock_path):
+                self.recover_journal()
+
+                if self.file_signature() != self.signature:
+                    self.merge_from_disk()
+
+                self.data["revision"] = self.base.get("revision", 0) + 1
+                text = serializer.dumps(self.data)
+
+                if self.journal:
+                    atomic_write_text(self.journal_path, text)
+
+                atomic_write_text(self.path, text)
+
+                if self.journal:
+                    remove_journal(self.journal_path)
+
+            self.base = serializer.loads(text)
+            self.signature = self.file_signature()
+            self.dirty = False
+
+    def merge_from_disk(self):
+        """Rebase our unsaved edits onto a revision written by someone else."""
+        theirs = serializer.load_file(self.path)
+
+        self.rebase(theirs)
+        self.signature = self.file_signature()
+
+    def rebase(self, theirs):
+        """
+        Three-way merge the unsaved document onto `theirs`, which becomes
+        the new base. On conflict `theirs` is loaded and the error re-raised.
+        """
+        base = dict(self.base)
+        ours = dict(self.data)
+        newer = dict(theirs)
+        for doc in (base, ours, newer):
+            doc.pop("revision", None)
+
+        try:
+            merged = merge_documents(base, ours, newer)
+        except StaleStateError:
+            self.replace_data(copy.deepcopy(theirs))
+            self.base = theirs
+            self.dirty = False
+            raise
+
+        merged["revision"] = theirs.get("revision", 0)
+        self.replace_data(merged)
+        self.base = theirs
+
+    def recover_journal(self):
+        """
+        Finish a write that was journaled but never renamed into place.
+        Call with the FileLock held.
+        """
+        if not os.path.exists(self.journal_path):
+            return
+
+        try:
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                text = f.read()
+            serializer.loads(text)
+        except ValueError:
+            # torn journal: the main file was never touched, keep it
+            remove_journal(self.journal_path)
+            return
+        except FileNotFoundError:
+            return
+
+        atomic_write_text(self.path, text)
+        remove_journal(self.journal_path)
+
+    def discard(self):
+        """Drop unsaved changes and re-read the file on the next load."""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            self.dirty = False
+            self.signature = None
+            self.pending_history = []
+
+    # ----------------------------------------------------------
+    # UNIT OF WORK
+    # ----------------------------------------------------------
+    @contextmanager
+    def transaction(self):
+        """
+        Group every mutation of one user action into a single write.
+        Nested transactions join the outermost one; an exception discards
+        the in-memory changes instead of persisting half an action.
+        """
+        with self.lock:
+            self.depth += 1
+            try:
+                yield self.data
+            except BaseException:
+                self.depth -= 1
+                if self.depth == 0:
+                    self.discard()
+                    self.load()
+                raise
+            else:
+                self.depth -= 1
+                if self.depth == 0 and (self.dirty or self.pending_history):
+                    if self.flush_delay is not None:
+                        self.schedule_flush()
+                    else:
+                        self.flush()
+
+    # ----------------------------------------------------------
+    # WRITE-BEHIND (DEBOUNCED FLUSH)
+    # ----------------------------------------------------------
+    def write_behind(self, delay=1.0):
+        """
+        Debounce saves: each save restarts a `delay`-second timer and the
+        document is written once the burst is over. Pass None to disable.
+        """
+        with self.lock:
+            self.flush_delay = delay
+            if delay is None:
+                self.flush()
+
+    def schedule_flush(self):
+        if self.timer is not None:
+            self.timer.cancel()
+        self.timer = threading.Timer(self.flush_delay, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    @classmethod
+    def flush_all(cls):
+        """Flush every open store (registered to run at interpreter exit)."""
+        with cls._registry_lock:
+            stores = list(cls._stores.values())
+        for store in stores:
+            store.flush()
+
+
+atexit.register(StateStore.flush_all)
+
+
+def transactional(method):
+    """Run a manager method as one unit of work on its `self.store`."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.store.transaction():
+            return method(self, *args, **kwargs)
+    return wrapper
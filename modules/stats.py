@@ -1,27 +1,59 @@
-import json
-from datetime import datetime, timedelta
-import random
+from datetime import timedelta
+
+from modules import statvec
+from modules.effects import EffectIndex
+from modules.history import HistoryLog
+from modules.state import StateStore, transactional
+from modules.timestamps import format_time, parse
+
+
+# ----------------------------------------------------------
+# RULE TABLES (shared with modules.simulate)
+# ----------------------------------------------------------
+# Conditions combine with & / | so they evaluate the same on plain numbers
+# and on NumPy arrays of emotional states.
+EMOTIONS = ("stress", "anxiety", "motivation", "clarity", "fatigue")
+
+EMOTION_RULES = [
+    # NEGATIVE STATES
+    ("wisdom", -1, lambda e: e["anxiety"] > 65),
+    ("charisma", -1, lambda e: e["stress"] > 70),
+    ("strength", -1, lambda e: e["fatigue"] > 60),
+    ("intelligence", -1, lambda e: e["clarity"] < 30),
+    ("luck", -1, lambda e: e["motivation"] < 25),
+
+    # POSITIVE STATES
+    ("wisdom", +1, lambda e: e["motivation"] > 80),
+    ("intelligence", +1, lambda e: e["clarity"] > 75),
+    ("dexterity", +1, lambda e: (e["stress"] < 30) & (e["clarity"] > 60)),
+]
+
+# (points of activation probability, condition) for curse_engine()
+CURSE_ENGINE_RISK = [
+    (30, lambda e: e["stress"] > 70),
+    (30, lambda e: e["anxiety"] > 70),
+    (15, lambda e: e["fatigue"] > 60),
+    (40, lambda e: (e["stress"] > 80) | (e["anxiety"] > 80)),
+]
 
 
 class StatsManager:
     def __init__(self, memory_path="data/system_memory.json"):
         self.path = memory_path
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
+        self.effects_history = HistoryLog.for_store(self.store, "effects_history")
 
     # ----------------------------------------------------------
     # BASIC FILE OPERATIONS
     # ----------------------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
+        if not self.store.exists():
             print("⚠ No memory file found. Creating a new one.")
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # ----------------------------------------------------------
     # BASE STATS
@@ -29,129 +61,153 @@ class StatsManager:
     def base_stats(self):
         return self.data.get("stats", {})
 
+    def base_vector(self):
+        return statvec.from_dict(self.base_stats())
+
+    # ----------------------------------------------------------
+    # EXPERIENCE & LEVEL UPS
+    # ----------------------------------------------------------
+    @transactional
+    def add_exp(self, amount):
+        """Adds EXP to the character; returns the number of levels gained."""
+        stats = self.data["stats"]
+        stats["exp"] = stats.get("exp", 0) + amount
+
+        levels = 0
+        while stats["exp"] >= stats["exp_to_next_level"]:
+            stats["exp"] -= stats["exp_to_next_level"]
+            stats["level"] += 1
+            stats["exp_to_next_level"] = int(stats["exp_to_next_level"] * 1.35)
+            levels += 1
+
+        self.save_memory()
+        return levels
+
     # ----------------------------------------------------------
     # EMOTIONAL MODIFIERS
     # ----------------------------------------------------------
     def emotional_modifiers(self):
-        emotion = self.data.get("emotion", {})
-        mods = {
-            "strength": 0, "intelligence": 0, "wisdom": 0,
-            "charisma": 0, "dexterity": 0, "luck": 0
-        }
+        return statvec.to_dict(self.emotional_vector())
 
-        stress = emotion.get("stress", 0)
-        anxiety = emotion.get("anxiety", 0)
-        motivation = emotion.get("motivation", 0)
-        clarity = emotion.get("clarity", 0)
-        fatigue = emotion.get("fatigue", 0)
+    def emotional_vector(self):
+        emotion = self.data.get("emotion", {})
+        e = {k: emotion.get(k, 0) for k in EMOTIONS}
 
-        # NEGATIVE STATES
-        if anxiety > 65: mods["wisdom"] -= 1
-        if stress > 70: mods["charisma"] -= 1
-        if fatigue > 60: mods["strength"] -= 1
-        if clarity < 30: mods["intelligence"] -= 1
-        if motivation < 25: mods["luck"] -= 1
+        # recomputed only when the emotional state actually changed
+        key = tuple(e.values())
+        cached = self.store.cache.get("emotional_modifiers")
+        if cached is not None and cached[0] == key:
+            return statvec.total(cached[1])
 
-        # POSITIVE STATES
-        if motivation > 80: mods["wisdom"] += 1
-        if clarity > 75: mods["intelligence"] += 1
-        if stress < 30 and clarity > 60: mods["dexterity"] += 1
+        mods = statvec.zeros()
+        for stat, delta, condition in EMOTION_RULES:
+            if condition(e):
+                mods[statvec.INDEX[stat]] += delta
 
-        return mods
+        self.store.cache["emotional_modifiers"] = (key, mods)
+        return statvec.total(mods)
 
     # ----------------------------------------------------------
     # EFFECT (BUFF/DEBUFF) SYSTEM
     # ----------------------------------------------------------
-    def active_effects(self):
-        """Return effects that haven't expired; remove expired ones."""
-        effects = self.data.get("effects", [])
-        now = datetime.now()
+    def effect_index(self):
+        """Expiry heap over `effects`, cached on the shared store."""
+        effects = self.data.setdefault("effects", [])
+        index = self.store.cache.get("effects")
+        if index is None or not index.tracks(effects):
+            index = EffectIndex(effects)
+            self.store.cache["effects"] = index
+        return index
 
-        cleaned = []
-        for e in effects:
-            expiry = datetime.strptime(e["expires_at"], "%Y-%m-%d %H:%M")
-            if expiry > now:
-                cleaned.append(e)
-
-        self.data["effects"] = cleaned
+    def active_effects(self):
+        """Return effects that haven't expired. Pure read: never writes."""
+        return self.effect_index().active(self.store.now())
+
+    def compact_effects(self):
+        """
+        Move expired effects to history. Only touches disk when something
+        actually expired; returns the pruned effects.
+        """
+        index = self.effect_index()
+        expired = index.take_expired(self.store.now())
+
+        if not expired:
+            return []
+
+        gone = {id(e) for e in expired}
+        active = [e for e in self.data["effects"] if id(e) not in gone]
+
+        self.effects_history.extend(expired)
+        self.data["effects"] = active
+        index.rebind(active)
         self.save_memory()
-        return cleaned
+        return expired
 
     def apply_effect_modifiers(self):
-        effects = self.active_effects()
+        return statvec.to_dict(self.effect_vector())
 
-        mods = {
-            "strength": 0, "intelligence": 0, "wisdom": 0,
-            "charisma": 0, "dexterity": 0, "luck": 0
-        }
-
-        for e in effects:
-            for stat, value in e.get("modifiers", {}).items():
-                mods[stat] += value
-
-        return mods
+    def effect_vector(self):
+        """Running total kept by the effect index (no per-call re-summing)."""
+        return self.effect_index().modifier_vector(self.store.now())
 
+    @transactional
     def add_effect(self, name, effect_type, duration_hours, modifiers, icon="default"):
-        now = datetime.now()
+        now = self.store.now()
         expiry = now + timedelta(hours=duration_hours)
 
         effect = {
             "name": name,
             "type": effect_type,   # buff | debuff
-            "start_at": now.strftime("%Y-%m-%d %H:%M"),
-            "expires_at": expiry.strftime("%Y-%m-%d %H:%M"),
+            "start_at": format_time(now),
+            "expires_at": format_time(expiry),
             "modifiers": modifiers,
             "icon": icon
         }
 
-        if "effects" not in self.data:
-            self.data["effects"] = []
-
+        self.compact_effects()
         self.data["effects"].append(effect)
+        self.effect_index().push(effect)
         self.save_memory()
         return effect
 
     # ----------------------------------------------------------
     # CURSE SYSTEM — "BESO DE LA BRUJA"
     # ----------------------------------------------------------
+    @transactional
     def curse_engine(self):
         """Latent curse activation + intensity scaling."""
         curse = self.data.get("curse", {})
-        emotion = self.data.get("emotion", {})
-
-        stress = emotion.get("stress", 0)
-        anxiety = emotion.get("anxiety", 0)
-        fatigue = emotion.get("fatigue", 0)
-
-        now = datetime.now()
+        now = self.store.now()
 
         # check cooldown
         last = curse.get("last_trigger")
         if last:
-            last_time = datetime.strptime(last, "%Y-%m-%d %H:%M")
+            last_time = parse(last)
             cd_hours = curse.get("cooldown_hours", 12)
             if now - last_time < timedelta(hours=cd_hours):
                 return  # still on cooldown
 
         # probability of activation = based on emotional stressors
-        probability = 0
-
-        if stress > 70: probability += 30
-        if anxiety > 70: probability += 30
-        if fatigue > 60: probability += 15
-        if stress > 80 or anxiety > 80: probability += 40
+        probability = self.curse_probability()
 
         # roll
-        roll = random.randint(1, 100)
+        roll = self.store.rng.randint(1, 100)
 
         if roll <= probability:
             self.trigger_curse()
-            curse["last_trigger"] = now.strftime("%Y-%m-%d %H:%M")
+            curse["last_trigger"] = format_time(now)
             self.save_memory()
 
+    def curse_probability(self):
+        """Activation chance (0–100+) of curse_engine for the current emotions."""
+        emotion = self.data.get("emotion", {})
+        e = {k: emotion.get(k, 0) for k in EMOTIONS}
+        return sum(points for points, condition in CURSE_ENGINE_RISK if condition(e))
+
+    @transactional
     def trigger_curse(self):
         """Activate the Beso de la Bruja debuff."""
-        intensity = random.choice([1, 2, 3, 4])
+        intensity = self.store.rng.choice([1, 2, 3, 4])
 
         modifiers = {
             1: {"energy": -10, "motivation": -5, "clarity": -5},
@@ -170,7 +226,7 @@ class StatsManager:
         self.add_effect(
             "Beso de la Bruja",
             "debuff",
-            duration_hours=random.randint(12, 48),
+            duration_hours=self.store.rng.randint(12, 48),
             modifiers=stat_mods,
             icon="curse"
         )
@@ -190,14 +246,31 @@ class StatsManager:
     # ----------------------------------------------------------
     def final_stats(self):
         base = self.base_stats()
-        emo = self.emotional_modifiers()
-        eff = self.apply_effect_modifiers()
+        bonus = statvec.add(self.emotional_vector(), self.effect_vector())
 
-        final = {}
-        for stat, value in base.items():
-            if stat in ["level", "exp", "exp_to_next_level", "energy", "max_energy"]:
-                final[stat] = value
-            else:
-                final[stat] = value + emo.get(stat, 0) + eff.get(stat, 0)
+        # only the six attributes are modified; level/exp/energy pass through
+        final = dict(base)
+        for stat in statvec.ATTRIBUTES:
+            if stat in final:
+                final[stat] = base[stat] + bonus[statvec.INDEX[stat]]
 
         return final
+
+    def simulate(self, **axes):
+        """
+        What-if evaluation over arrays of emotional states (see
+        modules.simulate.simulate); axes not given use the current value.
+        """
+        from modules.simulate import simulate
+
+        emotion = self.data.get("emotion", {})
+        values = {k: axes.get(k, emotion.get(k, 0)) for k in EMOTIONS}
+        return simulate(**values)
+
+    def final_vector(self):
+        """final_stats() as a stat vector, for batch/what-if evaluation."""
+        vec = self.base_vector()
+        bonus = statvec.add(self.emotional_vector(), self.effect_vector())
+        for i in range(len(statvec.ATTRIBUTES)):
+            vec[i] += bonus[i]
+        return vec
@@ -0,0 +1,48 @@
+from array import array
+
+
+# ----------------------------------------------------------
+# FIXED STAT ORDER
+# ----------------------------------------------------------
+# The six attributes come first so `vec[:6]` is always the attribute block;
+# energy/level ride along for producers that touch them (habits, curses).
+ATTRIBUTES = ("strength", "intelligence", "wisdom", "charisma", "dexterity", "luck")
+FIELDS = ATTRIBUTES + ("energy", "max_energy", "level", "exp", "exp_to_next_level")
+INDEX = {name: i for i, name in enumerate(FIELDS)}
+SIZE = len(FIELDS)
+
+_ZEROS = array("i", [0]) * SIZE
+
+
+def zeros():
+    """A fresh all-zero stat vector."""
+    return array("i", _ZEROS)
+
+
+def from_dict(values):
+    """Vector from a `{"wisdom": -1, ...}` dict; non-stat keys are ignored."""
+    vec = zeros()
+    for name, value in values.items():
+        i = INDEX.get(name)
+        if i is not None:
+            vec[i] = int(value)
+    return vec
+
+
+def to_dict(vec, fields=ATTRIBUTES):
+    """Dict view of `vec` (attributes only by default) for the UI/JSON side."""
+    return {name: vec[INDEX[name]] for name in fields}
+
+
+def add(dst, src, sign=1):
+    """dst += sign * src, in place."""
+    for i in range(SIZE):
+        dst[i] += sign * src[i]
+    return dst
+
+
+def total(*vecs):
+    out = zeros()
+    for v in vecs:
+        add(out, v)
+    return out
@@ -0,0 +1,149 @@
+import bisect
+from collections import Counter
+from datetime import date
+
+from modules.habit_log import day_ordinal
+
+
+# every this many consecutive days is one rewarded "week" of streak
+STREAK_WEEK = 7
+
+
+def runs_of(bits, origin):
+    """
+    [start, end] day ordinals of every run of set bits, oldest first.
+    Run boundaries come from two whole-int masks, so the cost is one
+    big-int step per run rather than per day.
+    """
+    starts = bits & ~(bits << 1)
+    ends = bits & ~(bits >> 1)
+
+    runs = []
+    while starts:
+        s = (starts & -starts).bit_length() - 1
+        e = (ends & -ends).bit_length() - 1
+        runs.append([origin + s, origin + e])
+        starts &= starts - 1
+        ends &= ends - 1
+    return runs
+
+
+class StreakEngine:
+    """
+    Streak runs per habit, kept in step with the habit log one toggle at
+    a time. Marking a day done extends or merges the neighbouring runs
+    and unmarking splits one, so retroactive edits cost O(log runs)
+    lookups instead of a re-scan of the log. from_log() rebuilds
+    everything from the bitsets (imports, first load).
+
+    Run lengths are also kept as a multiset, so the longest streak is
+    O(distinct lengths) even after the longest run is split.
+    """
+
+    def __init__(self):
+        self.runs = {}       # habit_id -> sorted [[start, end], ...] (day ordinals)
+        self.lengths = {}    # habit_id -> Counter(run length -> runs)
+        self.weeks = {}      # habit_id -> sum of full STREAK_WEEKs over all runs
+
+    @classmethod
+    def from_log(cls, log):
+        engine = cls()
+        for habit_id, bits in log.bits.items():
+            engine.load_runs(habit_id, runs_of(bits, log.origin) if bits else [])
+        return engine
+
+    def load_runs(self, habit_id, runs):
+        self.runs[habit_id] = runs
+        self.lengths[habit_id] = Counter(e - s + 1 for s, e in runs)
+        self.weeks[habit_id] = sum((e - s + 1) // STREAK_WEEK for s, e in runs)
+
+    # ----------------------------------------------------------
+    # INCREMENTAL UPDATES
+    # ----------------------------------------------------------
+    def add_run(self, habit_id, run):
+        n = run[1] - run[0] + 1
+        self.lengths[habit_id][n] += 1
+        self.weeks[habit_id] += n // STREAK_WEEK
+
+    def drop_run(self, habit_id, run):
+        n = run[1] - run[0] + 1
+        lengths = self.lengths[habit_id]
+        lengths[n] -= 1
+        if not lengths[n]:
+            del lengths[n]
+        self.weeks[habit_id] -= n // STREAK_WEEK
+
+    def run_at(self, habit_id, ordinal):
+        """Index of the run whose start is the last one <= ordinal (or -1)."""
+        return bisect.bisect_right(self.runs[habit_id], ordinal, key=lambda r: r[0]) - 1
+
+    def set(self, habit_id, day, done):
+        """Record `day` as done/undone for `habit_id`."""
+        if habit_id not in self.runs:
+            self.load_runs(habit_id, [])
+        runs = self.runs[habit_id]
+        d = day_ordinal(day)
+        i = self.run_at(habit_id, d)
+        inside = i >= 0 and runs[i][1] >= d
+
+        if done:
+            if inside:
+                return
+            left = runs[i] if i >= 0 and runs[i][1] == d - 1 else None
+            right = runs[i + 1] if i + 1 < len(runs) and runs[i + 1][0] == d + 1 else None
+
+            new = [left[0] if left else d, right[1] if right else d]
+            for old in (left, right):
+                if old:
+                    self.drop_run(habit_id, old)
+
+            if left and right:
+                runs[i:i + 2] = [new]
+            elif left:
+                runs[i] = new
+            elif right:
+                runs[i + 1] = new
+            else:
+                runs.insert(i + 1, new)
+            self.add_run(habit_id, new)
+
+        else:
+            if not inside:
+                return
+            old = runs[i]
+            self.drop_run(habit_id, old)
+            pieces = [r for r in ([old[0], d - 1], [d + 1, old[1]]) if r[0] <= r[1]]
+            runs[i:i + 1] = pieces
+            for r in pieces:
+                self.add_run(habit_id, r)
+
+    # ----------------------------------------------------------
+    # QUERIES
+    # ----------------------------------------------------------
+    def current(self, habit_id, today):
+        """
+        Length of the streak still alive on `today`: the run that reaches
+        today, or yesterday (today not logged yet doesn't break it).
+        """
+        runs = self.runs.get(habit_id)
+        if not runs:
+            return 0
+        t = day_ordinal(today)
+        i = self.run_at(habit_id, t)
+        if i < 0 or runs[i][1] < t - 1:
+            return 0
+        return min(runs[i][1], t) - runs[i][0] + 1
+
+    def longest(self, habit_id):
+        lengths = self.lengths.get(habit_id)
+        return max(lengths) if lengths else 0
+
+    def full_weeks(self, habit_id):
+        return self.weeks.get(habit_id, 0)
+
+    def history(self, habit_id):
+        """Every streak as (first day, last day, length), oldest first."""
+        return [
+            (date.fromordinal(s), date.fromordinal(e), e - s + 1)
+            for s, e in self.runs.get(habit_id, [])
+        ]
@@ -0,0 +1,38 @@
+import functools
+from datetime import datetime
+
+
+# every timestamp in the state document uses this layout
+TIME_FORMAT = "%Y-%m-%d %H:%M"
+
+
+# ----------------------------------------------------------
+# PARSE ONCE
+# ----------------------------------------------------------
+@functools.lru_cache(maxsize=65536)
+def parse(text):
+    """
+    datetime for a "YYYY-MM-DD HH:MM" string, memoized: each distinct
+    timestamp is parsed once per process no matter how many loops read
+    it. datetimes are immutable, so callers can share the cached value.
+    """
+    if len(text) == 16 and text[4] == "-" and text[7] == "-" and text[10] == " " and text[13] == ":":
+        try:
+            return datetime(
+                int(text[0:4]), int(text[5:7]), int(text[8:10]),
+                int(text[11:13]), int(text[14:16])
+            )
+        except ValueError:
+            pass
+    # anything unusual goes through strptime for the exact same errors
+    return datetime.strptime(text, TIME_FORMAT)
+
+
+@functools.lru_cache(maxsize=65536)
+def epoch(text):
+    """Local-time epoch seconds of a timestamp string (memoized)."""
+    return parse(text).timestamp()
+
+
+def format_time(dt):
+    return dt.strftime(TIME_FORMAT)
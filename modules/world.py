@@ -1,26 +1,22 @@
-import json
-import random
-from datetime import datetime
+from modules.history import HistoryLog
+from modules.state import StateStore, transactional
 
 
 class WorldManager:
     def __init__(self, memory_path="data/system_memory.json"):
         self.path = memory_path
+        self.store = StateStore.open(memory_path)
         self.data = self.load_memory()
+        self.events = HistoryLog.for_store(self.store, "events")
 
     # ----------------------------------------------------------
     # LOAD / SAVE MEMORY
     # ----------------------------------------------------------
     def load_memory(self):
-        try:
-            with open(self.path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except FileNotFoundError:
-            return {}
+        return self.store.load()
 
     def save_memory(self):
-        with open(self.path, "w", encoding="utf-8") as f:
-            json.dump(self.data, f, indent=4, ensure_ascii=False)
+        self.store.save(self.data)
 
     # ----------------------------------------------------------
     # REINOS DEL MUNDO
@@ -44,6 +40,7 @@ class WorldManager:
     # ----------------------------------------------------------
     # REAL EVENTS (YOU INPUT THEM)
     # ----------------------------------------------------------
+    @transactional
     def register_real_event(self, category, description, intensity=1):
         """
         category: work, family, finance, emotions, politics...
@@ -54,13 +51,10 @@ class WorldManager:
             "category": category,
             "description": description,
             "intensity": intensity,
-            "date": datetime.now().strftime("%Y-%m-%d")
+            "date": self.store.now().strftime("%Y-%m-%d")
         }
 
-        if "events" not in self.data:
-            self.data["events"] = []
-
-        self.data["events"].append(event)
+        self.events.append(event)
 
         # Apply emotional impact
         self.apply_real_event_impact(event)
@@ -117,6 +111,7 @@ class WorldManager:
     # ----------------------------------------------------------
     # WORLD RANDOM EVENTS (SOFT)
     # ----------------------------------------------------------
+    @transactional
     def generate_random_world_event(self):
         """
         These events are harmless and thematic, only affect stats slightly.
@@ -150,7 +145,7 @@ class WorldManager:
             }
         ]
 
-        chosen = random.choice(events)
+        chosen = self.store.rng.choice(events)
 
         # apply effect
         emotion = self.data.get("emotion", {})
@@ -161,14 +156,11 @@ class WorldManager:
         self.data["emotion"] = emotion
 
         # log event
-        if "events" not in self.data:
-            self.data["events"] = []
-
-        self.data["events"].append({
+        self.events.append({
             "type": "random_world",
             "name": chosen["name"],
             "description": chosen["description"],
-            "date": datetime.now().strftime("%Y-%m-%d")
+            "date": self.store.now().strftime("%Y-%m-%d")
         })
 
         self.save_memory()
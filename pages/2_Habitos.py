@@ -1,6 +1,5 @@
 import streamlit as st
 import pandas as pd
-import matplotlib.pyplot as plt
 from datetime import datetime, timedelta
 from modules.habits import HabitsManager
 
@@ -81,12 +80,9 @@ weekday = datetime.now().strftime("%a")  # Mon, Tue...
 # LISTA DE HÁBITOS
 # ============================================================
 definitions = hm.get_definitions()
-daily_log = hm.get_daily_log()
+habit_log = hm.habit_log()
 streaks = hm.get_streaks()
 
-if today not in daily_log:
-    daily_log[today] = {}
-
 st.markdown("## 📅 Hábitos de Hoy")
 
 for habit in definitions:
@@ -99,7 +95,7 @@ for habit in definitions:
     name = habit["name"]
 
     # Valor actual (True/False)
-    current_value = daily_log[today].get(habit_id, False)
+    current_value = habit_log.get(habit_id, today)
 
     col1, col2, col3 = st.columns([4,1,1])
 
@@ -114,7 +110,7 @@ for habit in definitions:
     with col3:
         streak_value = streaks.get(habit_id, 0)
         st.markdown(
-            f"<span class='streak-badge'>🔥 {streak_value} días</span>",
+            f"<span class='streak-badge'>🔥 {streak_value} días · récord {hm.longest_streak(habit_id)}</span>",
             unsafe_allow_html=True
         )
 
@@ -125,25 +121,49 @@ st.markdown("---")
 
 
 # ============================================================
-# GRÁFICO SEMANAL
+# GRÁFICOS (rollups precalculados de HabitsManager)
 # ============================================================
 st.markdown("## 📊 Resumen Semanal (Últimos 7 días)")
 
-week_start = datetime.now() - timedelta(days=6)
-summary = hm.get_week_summary(week_start)
+now = datetime.now()
+week_start = now - timedelta(days=6)
+week = hm.get_rollups(week_start, now)
 
 df = pd.DataFrame({
-    "Día": [(week_start + timedelta(days=i)).strftime("%a") for i in range(7)],
-    "Completados": summary
-})
-
-fig, ax = plt.subplots(figsize=(8,3))
-ax.bar(df["Día"], df["Completados"])
-ax.set_title("Hábitos Completados por Día (Semana Actual)")
-ax.set_ylabel("Cantidad")
-ax.set_ylim(0, max(summary) + 1)
-
-st.pyplot(fig)
+    "Día": [f"{i} {datetime.strptime(day, '%Y-%m-%d').strftime('%a')}" for i, (day, _) in enumerate(week)],
+    "Completados": [e["total"] for _, e in week],
+}).set_index("Día")
+st.bar_chart(df)
+
+tab_month, tab_year = st.tabs(["📅 Este mes", "🗓️ Este año"])
+
+with tab_month:
+    month_start = now.replace(day=1)
+    month = hm.get_rollups(month_start, now)
+    st.bar_chart(pd.DataFrame(
+        {h["id"]: [e["habits"].get(h["id"], 0) for _, e in month] for h in definitions},
+        index=[day[-2:] for day, _ in month],
+    ))
+
+with tab_year:
+    year = hm.get_rollups(now.replace(month=1, day=1), now.replace(month=12, day=31), "month")
+    st.bar_chart(pd.DataFrame(
+        {h["id"]: [e["habits"].get(h["id"], 0) for _, e in year] for h in definitions},
+        index=[month for month, _ in year],
+    ))
+
+    totals = hm.get_totals(now.replace(month=1, day=1), now)
+    colW, colD = st.columns(2)
+    colW.markdown("**Por día de la semana**")
+    colW.bar_chart(pd.DataFrame(
+        {"Completados": totals["weekdays"]},
+        index=["0 Mon", "1 Tue", "2 Wed", "3 Thu", "4 Fri", "5 Sat", "6 Sun"],
+    ))
+    colD.markdown("**EXP de dominios ganada**")
+    if totals["domains"]:
+        colD.bar_chart(pd.Series(totals["domains"], name="EXP"))
+    else:
+        colD.caption("Sin EXP de dominios este año.")
 
 
 # ============================================================
@@ -152,12 +172,12 @@ st.pyplot(fig)
 st.markdown("---")
 st.markdown("## 📈 Estadísticas de la Semana")
 
-total_completed = sum(summary)
-best_day = df.loc[df["Completados"].idxmax(), "Día"]
+week_totals = hm.get_totals(week_start, now)
+best_day = df["Completados"].idxmax()
 
 colA, colB, colC = st.columns(3)
-colA.metric("Total completados", total_completed)
-colB.metric("Mejor día", best_day)
+colA.metric("Total completados", week_totals["total"])
+colB.metric("Mejor día", best_day.split()[1])
 colC.metric("Hábito más fuerte", max(streaks, key=streaks.get) if streaks else "N/A")
 
 
@@ -197,7 +217,7 @@ with st.expander("➕ Agregar un hábito nuevo"):
             }
         }
 
-        hm.habits["definitions"].append(new_habit)
+        hm.section().setdefault("definitions", []).append(new_habit)
         hm.save_json(hm.habits_path, hm.habits)
         st.success("Hábito agregado con éxito. Recarga la página.")
         st.experimental_rerun()
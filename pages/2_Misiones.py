@@ -12,6 +12,11 @@ memory = MemoryManager()
 
 data = missions.data
 
+
+def complete(mission_id):
+    # corre antes del render siguiente: la lista ya sale actualizada, sin rerun
+    st.session_state["mission_msg"] = missions.complete_from_ui(mission_id)
+
 # -----------------------------------------------------------
 # SOLO LEVELING CSS
 # -----------------------------------------------------------
@@ -101,6 +106,10 @@ st.markdown("---")
 # -----------------------------------------------------------
 st.subheader("📘 Misiones Activas")
 
+msg = st.session_state.pop("mission_msg", None)
+if msg:
+    getattr(st, msg[0])(msg[1])
+
 mission_types = {
     "daily": "🟦 Diarias",
     "weekly": "🟨 Semanales",
@@ -115,7 +124,7 @@ for mtype, title in mission_types.items():
         st.info("No hay misiones en esta categoría.")
         continue
 
-    for i, m in enumerate(data["missions"][mtype]):
+    for m in data["missions"][mtype]:
 
         # --------------------------------------------------------
         # 🔧 Parche automático para misiones antiguas
@@ -176,10 +185,12 @@ for mtype, title in mission_types.items():
             # BOTÓN COMPLETAR
             # ------------------------------------------------------
             if m["status"] == "pending":
-                if st.button(f"✔ Completar «{m['title']}»", key=f"{mtype}_{i}"):
-                    missions.complete_mission(mtype, i)
-                    st.success("¡Misión completada! Recompensas aplicadas.")
-                    st.experimental_rerun()
+                st.button(
+                    f"✔ Completar «{m['title']}»",
+                    key=f"complete_{m['id']}",
+                    on_click=complete,
+                    args=(m["id"],)
+                )
 
             st.markdown("</div>", unsafe_allow_html=True)
 
@@ -189,14 +200,23 @@ for mtype, title in mission_types.items():
 st.markdown("---")
 st.subheader("❌ Misiones Fallidas Automáticamente")
 
-failed = missions.fail_expired_missions()
+# el scheduler las marca al vencer el deadline; aquí solo se listan
+failed = [
+    m for mtype in missions.data["missions"].values() for m in mtype
+    if m["status"] == "failed"
+]
+failed.sort(key=lambda m: m["deadline"], reverse=True)
 
 if failed:
-    for m in failed:
+    for m in failed[:10]:
         st.error(f"⚠ {m['title']} — Deadline: {m['deadline']}")
 else:
     st.info("No hay misiones vencidas.")
 
+next_deadline = missions.next_deadline()
+if next_deadline:
+    st.caption(f"⏳ Próximo vencimiento: {next_deadline.strftime('%Y-%m-%d %H:%M')}")
+
 # -----------------------------------------------------------
 # CREAR MISIÓN MANUAL
 # -----------------------------------------------------------
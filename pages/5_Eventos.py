@@ -13,7 +13,7 @@ world = WorldManager()
 stats = StatsManager()
 memory = MemoryManager()
 
-events = world.data.get("events", [])
+events = world.events.read()
 
 # -----------------------------------------------------------
 # TÍTULO
@@ -65,10 +65,7 @@ else:
 
             # BOTÓN PARA BORRAR EVENTO INDIVIDUAL
             if st.button(f"Eliminar evento #{i}", key=f"delete_{i}"):
-                idx = events.index(e)
-                del events[idx]
-                world.data["events"] = events
-                world.save_memory()
+                world.events.remove(e)
                 st.warning("Evento eliminado.")
                 st.experimental_rerun()
 
@@ -80,7 +77,7 @@ st.markdown("## 📖 Narrativa del Día")
 
 today = datetime.now().strftime("%Y-%m-%d")
 
-events_today = [e for e in events if e.get("date") == today]
+events_today = world.events.read(since=today, until=today)
 emotion = stats.data.get("emotion", {})
 boss = stats.data.get("bosses", {})
 realms = stats.data.get("world", {}).get("realms", {})
@@ -1,5 +1,7 @@
 import streamlit as st
+import matplotlib.pyplot as plt
 from modules.stats import StatsManager
+from modules.simulate import risk_grid
 from datetime import datetime, timedelta
 
 st.set_page_config(
@@ -248,3 +250,36 @@ if st.button("➕ Crear Efecto"):
     except:
         st.error("Error en el formato de modificadores. Usa: stat:valor, stat:valor")
 
+
+st.markdown("---")
+
+
+# ==========================================================
+# SECTION 6 — MAPA DE RIESGO DE LA MALDICIÓN (WHAT-IF)
+# ==========================================================
+st.markdown("<div class='sl-title'>🔮 Mapa de Riesgo de la Maldición</div>", unsafe_allow_html=True)
+
+emotion = stats.data.get("emotion", {})
+
+col_m, col_c, col_f = st.columns(3)
+sim_motivation = col_m.slider("Motivación", 0, 100, int(emotion.get("motivation", 60)))
+sim_clarity = col_c.slider("Claridad", 0, 100, int(emotion.get("clarity", 55)))
+sim_fatigue = col_f.slider("Fatiga", 0, 100, int(emotion.get("fatigue", 30)))
+
+axis, risk = risk_grid(
+    101, motivation=sim_motivation, clarity=sim_clarity, fatigue=sim_fatigue
+)
+
+fig, axes = plt.subplots(1, 2, figsize=(10, 4))
+panels = [
+    (risk["curse_engine"], "Motor latente (curse_engine)"),
+    (risk["auto_trigger"], "Activación automática"),
+]
+for ax, (grid, title) in zip(axes, panels):
+    im = ax.imshow(grid, origin="lower", extent=[0, 100, 0, 100], vmin=0, vmax=1, cmap="magma")
+    ax.scatter([emotion.get("stress", 0)], [emotion.get("anxiety", 0)], c="cyan", marker="x")
+    ax.set_title(title)
+    ax.set_xlabel("Estrés")
+    ax.set_ylabel("Ansiedad")
+fig.colorbar(im, ax=axes, label="Probabilidad")
+st.pyplot(fig)
@@ -1,6 +1,7 @@
 import streamlit as st
 from modules.missions import MissionManager
 from modules.stats import StatsManager
+from modules.history import HistoryLog
 from datetime import datetime
 
 st.set_page_config(page_title="Recompensas — Aureon Nightweaver", layout="wide")
@@ -104,7 +105,7 @@ else:
                     missions.data["dark_points"] -= reward["cost"]
 
                     # Log the purchase
-                    missions.data["logs"].append({
+                    HistoryLog.for_store(missions.store, "logs").append({
                         "date": datetime.now().strftime("%Y-%m-%d %H:%M"),
                         "entry": f"Recompensa adquirida: {reward['name']} (-{reward['cost']} Dark Points)"
                     })